@@ -3,12 +3,6 @@
 # For the full list of built-in configuration values, see the documentation:
 # https://www.sphinx-doc.org/en/master/usage/configuration.html
 
-import os
-import sys
-
-# Add source directory to path for autodoc
-sys.path.insert(0, os.path.abspath("../src"))
-
 # -- Project information -----------------------------------------------------
 # https://www.sphinx-doc.org/en/master/usage/configuration.html#project-information
 
@@ -22,7 +16,7 @@ version = "0.2.0"
 # https://www.sphinx-doc.org/en/master/usage/configuration.html#general-configuration
 
 extensions = [
-    "sphinx.ext.autodoc",
+    "autoapi.extension",
     "sphinx.ext.viewcode",
     "sphinx.ext.napoleon",
     "sphinx.ext.intersphinx",
@@ -36,17 +30,20 @@ exclude_patterns = ["_build", "Thumbs.db", ".DS_Store"]
 
 language = "en"
 
-# -- Autodoc configuration ---------------------------------------------------
-autodoc_default_options = {
-    "members": True,
-    "member-order": "bysource",
-    "special-members": "__init__",
-    "undoc-members": True,
-    "exclude-members": "__weakref__",
-}
-
-autodoc_typehints = "description"
-autodoc_type_aliases = {}
+# -- AutoAPI configuration ---------------------------------------------------
+# https://sphinx-autoapi.readthedocs.io/en/latest/reference/config.html
+# AutoAPI parses the sources statically, so building the docs does not import
+# tiny8 (or matplotlib/curses).
+
+autoapi_dirs = ["../src"]
+autoapi_root = "api"
+autoapi_add_toctree_entry = False  # linked from the API Reference toctree
+autoapi_member_order = "bysource"
+autoapi_options = [
+    "members",
+    "show-inheritance",
+    "show-module-summary",
+]
 
 # -- Napoleon settings -------------------------------------------------------
 napoleon_google_docstring = True
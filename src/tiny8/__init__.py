@@ -4,11 +4,15 @@ Provides a compact CPU implementation, assembler and visualization helpers
 for experimentation and teaching.
 """
 
+import importlib
+
 from .assembler import AsmResult, assemble, assemble_file
-from .cli import run_cli
 from .cpu import CPU
 from .utils import ProgressBar
-from .visualizer import Visualizer
+
+# The visualizer (matplotlib) and the terminal UI (curses, NumPy) dominate
+# import time, so they are only imported on first attribute access.
+_LAZY_ATTRS = {"Visualizer": ".visualizer", "run_cli": ".cli"}
 
 __all__ = [
     "CPU",
@@ -21,3 +25,16 @@ __all__ = [
 ]
 
 __version__ = "0.2.0"
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
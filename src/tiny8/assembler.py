@@ -4,27 +4,59 @@ This module provides a tiny assembler that tokenizes and parses a simple
 assembly syntax and returns a list of instructions and a label mapping.
 """
 
+import os
 import re
+import sys
+from collections.abc import Iterable
 from dataclasses import dataclass, field
 
+# Numeric operand literal, optionally prefixed with the '#' immediate marker.
+# Matched against whole tokens, so e.g. "0x1G" stays a symbol, matching
+# _parse_number.
+_NUMBER = re.compile(
+    r"""
+    \#?(?:
+        \$(?P<HEX>[+-]?[0-9A-Fa-f]+)
+        | 0x(?P<HEX0X>[0-9A-Fa-f]+)
+        | 0b(?P<BIN>[01]+)
+        | (?P<DEC>-?\d+)
+    )
+    """,
+    re.VERBOSE,
+)
+
+# Integer base for each _NUMBER group.
+_NUMBER_BASES = {"HEX": 16, "HEX0X": 16, "BIN": 2, "DEC": 10}
+
 
 @dataclass
 class AsmResult:
     """Result of assembling source code.
 
     Attributes:
-        program: List of instruction tuples (mnemonic, operands).
+        program: Tuple of instruction tuples (mnemonic, operands). The listing
+            is immutable so one result can be loaded into several CPUs.
         labels: Mapping from label names to program counter addresses.
         pc_to_line: Mapping from program counter to original source line number.
-        source_lines: Original source text split into lines for display.
+            Only populated when assembling with ``keep_source=True``.
+        source_lines: Original source text split into lines for display. Only
+            populated when assembling with ``keep_source=True``.
     """
 
-    program: list[tuple[str, tuple]] = field(default_factory=list)
+    program: tuple[tuple[str, tuple], ...] = ()
     labels: dict[str, int] = field(default_factory=dict)
     pc_to_line: dict[int, int] = field(default_factory=dict)
     source_lines: list[str] = field(default_factory=list)
 
 
+# assemble_file results keyed by (absolute path, mtime in ns, size,
+# keep_source), so re-assembling an unchanged file skips parsing. Callers get
+# copies of these (see _copy_result). Oldest entries are evicted once
+# _FILE_CACHE_SIZE files are cached.
+_FILE_CACHE: dict[tuple[str, int, int, bool], AsmResult] = {}
+_FILE_CACHE_SIZE = 32
+
+
 def _parse_number(token: str) -> int:
     """Parse a numeric assembly token and return its integer value.
 
@@ -49,88 +81,178 @@ def _parse_number(token: str) -> int:
     """
     t = token.strip()
     # strip immediate marker
-    if t.startswith("#"):
+    if t[:1] == "#":
         t = t[1:]
-    # $nn as hex
-    if t.startswith("$"):
+    # dispatch on the first character(s) instead of chained startswith calls
+    c = t[:1]
+    if c == "$":
         return int(t[1:], 16)
-    if t.startswith("0x"):
-        return int(t, 16)
-    if t.startswith("0b"):
-        return int(t, 2)
-    if t.isdigit() or (t.startswith("-") and t[1:].isdigit()):
+    if c == "0":
+        c2 = t[1:2]
+        if c2 == "x":
+            return int(t, 16)
+        if c2 == "b":
+            return int(t, 2)
+    if t.isdigit() or (c == "-" and t[1:].isdigit()):
         return int(t)
     # otherwise return as-is (label)
     raise ValueError(f"Unable to parse numeric token: {token}")
 
 
-def parse_asm(text: str) -> AsmResult:
-    """Parse assembly source text into a program listing and a label table.
+def _parse_operand(tok: str) -> tuple[str, int] | int | str:
+    """Classify a single operand token.
+
+    Args:
+        tok: Non-empty operand token without separators.
+
+    Returns:
+        ``("reg", N)`` for a register, the integer value of a numeric
+        literal (see _parse_number), or the token itself as a symbol.
+    """
+    c = tok[0]
+    if (c == "r" or c == "R") and tok[1:].isdecimal():
+        return ("reg", int(tok[1:]))
+    num = _NUMBER.fullmatch(tok)
+    if num is None:
+        return tok
+    kind = num.lastgroup
+    return int(num.group(kind), _NUMBER_BASES[kind])
 
-    The function scans the given assembly text line-by-line and produces
-    an AsmResult containing the parsed program, labels, source line
-    mapping, and original source text.
+
+def parse_asm_lines(lines: Iterable[str], keep_source: bool = False) -> AsmResult:
+    """Parse assembly source lines into a program listing and a label table.
+
+    The function consumes the given lines one at a time, so any iterable
+    (including an open file) can be assembled without first materializing
+    the whole text, and produces an AsmResult containing the parsed
+    program, labels, source line mapping, and original source text.
 
     Args:
-        text: Assembly source code as a single string. May contain comments,
-            blank lines and labels.
+        lines: Iterable of source lines without line terminators. Lines may
+            contain comments, be blank, or hold labels.
+        keep_source: If True, keep the original lines in
+            ``result.source_lines`` and fill ``result.pc_to_line`` (needed
+            only for source display).
 
     Returns:
         AsmResult object containing program, labels, pc_to_line mapping,
         and source_lines.
 
+    Raises:
+        ValueError: If a symbolic operand does not name a label defined
+            anywhere in the source.
+
     Note:
         - Comments begin with ';' and extend to the end of the line.
         - Labels may appear on a line by themselves or before an instruction
           with the form "label: instr ...".
         - Registers are encoded as ("reg", N) where N is the register number.
-        - Numeric operands are parsed using _parse_number; non-numeric tokens
-          are preserved as strings (symbols) for later resolution.
+        - Numeric operands accept the same notations as _parse_number and
+          are converted while tokenizing; non-numeric tokens are preserved
+          as strings (symbols) for later resolution.
+    """
+    if keep_source:
+        # materialized once; the same list becomes result.source_lines
+        lines = list(lines)
+    return _parse_lines(lines, lines if keep_source else None)
+
+
+def _parse_lines(lines: Iterable[str], source_lines: list[str] | None) -> AsmResult:
+    """Parse source lines; shared implementation of the public parsers.
+
+    Args:
+        lines: Iterable of source lines without line terminators.
+        source_lines: The same lines as a list when source is kept (stored
+            as ``result.source_lines`` without copying), else None.
+
+    Returns:
+        The parsed AsmResult.
     """
     result = AsmResult()
+    program: list[tuple[str, tuple]] = []
     pc = 0
-    lines = text.splitlines()
-    result.source_lines = lines.copy()
+    pc_to_line = None
+    if source_lines is not None:
+        result.source_lines = source_lines
+        pc_to_line = result.pc_to_line
+    # (symbol, line number) of every symbolic operand, checked once all
+    # labels are known.
+    symbol_refs: list[tuple[str, int]] = []
+    # Operand tokens repeat heavily (registers, labels, small constants), so
+    # each distinct token is classified once per parse.
+    operands: dict[str, object] = {}
     for line_num, line in enumerate(lines):
-        line = line.split(";", 1)[0].strip()
-        if not line:
+        # find() returns -1 without allocating on the common no-comment path
+        semi = line.find(";")
+        if semi != -1:
+            line = line[:semi]
+        colon = line.find(":")
+        if colon != -1:
+            result.labels[sys.intern(line[:colon].strip())] = pc
+            line = line[colon + 1 :]
+        # commas and whitespace both separate tokens
+        tokens = line.replace(",", " ").split()
+        if not tokens:
             continue
-        if ":" in line:
-            left, right = line.split(":", 1)
-            lbl = left.strip()
-            result.labels[lbl] = pc
-            line = right.strip()
-            if not line:
-                continue
-        parts = [p for p in re.split(r"[\s,]+", line) if p != ""]
-        instr = parts[0].upper()
+        # interned so repeated mnemonics share one string for dispatch lookups
+        instr = sys.intern(tokens[0].upper())
         ops = []
-        for p in parts[1:]:
-            pl = p.lower()
-            if pl.startswith("r") and pl[1:].isdigit():
-                ops.append(("reg", int(pl[1:])))
-            else:
-                try:
-                    n = _parse_number(p)
-                    ops.append(n)
-                except ValueError:
-                    ops.append(p)
-        result.program.append((instr, tuple(ops)))
-        result.pc_to_line[pc] = line_num
+        for tok in tokens[1:]:
+            op = operands.get(tok)
+            if op is None:
+                op = operands[tok] = _parse_operand(tok)
+            if op.__class__ is str:
+                symbol_refs.append((op, line_num))
+            ops.append(op)
+        program.append((instr, tuple(ops)))
+        if pc_to_line is not None:
+            pc_to_line[pc] = line_num
         pc += 1
+    # Static link check: every symbolic operand must name a defined label.
+    for symbol, line_num in symbol_refs:
+        if symbol not in result.labels:
+            raise ValueError(f"Undefined label '{symbol}' at line {line_num + 1}")
+    result.program = tuple(program)
     return result
 
 
-def assemble(text: str) -> AsmResult:
+def parse_asm(text: str, keep_source: bool = False) -> AsmResult:
+    """Parse assembly source text into a program listing and a label table.
+
+    Args:
+        text: Assembly source code as a single string. May contain comments,
+            blank lines and labels.
+        keep_source: If True, keep the original lines in
+            ``result.source_lines`` and fill ``result.pc_to_line``.
+
+    Returns:
+        AsmResult object containing program, labels, pc_to_line mapping,
+        and source_lines.
+
+    Raises:
+        ValueError: If a symbolic operand does not name a defined label.
+
+    Note:
+        Equivalent to parse_asm_lines(text.splitlines(), keep_source); the
+        fresh list from splitlines() is kept as-is when source is kept.
+    """
+    lines = text.splitlines()
+    return _parse_lines(lines, lines if keep_source else None)
+
+
+def assemble(text: str, keep_source: bool = False) -> AsmResult:
     """Parse assembly source text and return parsed instructions and label map.
 
     Args:
         text: Assembly source code as a single string. May contain
             multiple lines, labels and comments.
+        keep_source: If True, keep the original source lines and the PC to
+            line mapping in the result for display (e.g. by the CLI); off by
+            default to save memory.
 
     Returns:
         AsmResult object containing program, labels, source line mapping,
-        and original source text.
+        and (if requested) original source text.
 
     Raises:
         Exception: Propagates parsing errors from the underlying parser.
@@ -141,28 +263,60 @@ def assemble(text: str) -> AsmResult:
         >>> result.labels
         {'start': 0}
     """
-    return parse_asm(text)
+    return parse_asm(text, keep_source)
 
 
-def assemble_file(path: str) -> AsmResult:
+def assemble_file(path: str, keep_source: bool = False) -> AsmResult:
     """Assemble the contents of a source file.
 
     Args:
         path: Path to the source file to assemble.
+        keep_source: If True, keep the original source lines and the PC to
+            line mapping in the result.
 
     Returns:
-        The result produced by calling assemble(source_text).
+        The same AsmResult that assemble(source_text) would produce.
 
     Raises:
         FileNotFoundError: If the specified file does not exist.
         OSError: For other I/O related errors when opening or reading the file.
-        Exception: Any exception raised by assemble(...) will be propagated.
+        Exception: Any exception raised while parsing will be propagated.
 
     Note:
-        The file is opened in text mode and read entirely into memory.
+        The file is opened in text mode and parsed line by line, so the
+        source is never held in memory as a single string. Results are
+        cached by path, modification time and size; assembling an unchanged
+        file again skips parsing. Each call returns a new AsmResult whose
+        labels, line mapping and source lines are its own copies.
 
     Example:
         >>> result = assemble_file("program.asm")
     """
-    with open(path, "r") as f:
-        return assemble(f.read())
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size, keep_source)
+    cached = _FILE_CACHE.get(key)
+    if cached is None:
+        with open(path, "r") as f:
+            cached = parse_asm_lines((line.rstrip("\n") for line in f), keep_source)
+        if len(_FILE_CACHE) >= _FILE_CACHE_SIZE:
+            del _FILE_CACHE[next(iter(_FILE_CACHE))]
+        _FILE_CACHE[key] = cached
+    return _copy_result(cached)
+
+
+def _copy_result(result: AsmResult) -> AsmResult:
+    """Return a copy of ``result`` that shares only the immutable listing.
+
+    Args:
+        result: Cached assembly result.
+
+    Returns:
+        A new AsmResult with its own labels, line mapping and source lines,
+        so a CPU that loads it cannot alter the cached entry.
+    """
+    return AsmResult(
+        program=result.program,
+        labels=dict(result.labels),
+        pc_to_line=dict(result.pc_to_line),
+        source_lines=list(result.source_lines),
+    )
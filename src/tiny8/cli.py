@@ -5,15 +5,39 @@ Simplified and enhanced CLI with Vim-style controls, marks, search, and more.
 
 from __future__ import annotations
 
-import argparse
+import bisect
 import curses
+import functools
+import math
 import time
+from collections import OrderedDict
 from collections.abc import Callable
 from dataclasses import dataclass, field
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+from . import __version__
+from .assembler import assemble_file
+from .cpu import CPU
+from .trace import StepTrace
+
+if TYPE_CHECKING:
+    import argparse
+
+    import numpy as np
 
 # Key handler registry
 _key_handlers: dict[int | str, Callable] = {}
+# Handlers of key codes below _KEY_TABLE_SIZE (every character and curses
+# KEY_* code), indexed directly by the code getch() returns.
+_KEY_TABLE_SIZE = 1024
+_key_table: list[Callable | None] = [None] * _KEY_TABLE_SIZE
+
+# Key codes tested directly by _handle_key
+_K_J, _K_K = map(ord, "jk")
+_K_ESC = 27
+_ENTER_KEYS = frozenset({curses.KEY_ENTER, 10, 13})
+_BACKSPACE_KEYS = frozenset({curses.KEY_BACKSPACE, 127, 8})
+_SCROLL_KEYS = frozenset({_K_J, _K_K})
 
 
 def key_handler(*keys: int | str):
@@ -31,6 +55,8 @@ def key_handler(*keys: int | str):
     def decorator(func: Callable) -> Callable:
         for key in keys:
             _key_handlers[key] = func
+            if isinstance(key, int) and 0 <= key < _KEY_TABLE_SIZE:
+                _key_table[key] = func
         return func
 
     return decorator
@@ -44,7 +70,7 @@ class ViewState:
         step_idx: Current step index in trace.
         scroll_offset: Vertical scroll offset for memory view.
         playing: Whether auto-play is active.
-        last_advance_time: Timestamp of last auto-advance.
+        last_advance_time: time.monotonic() of the last auto-advance.
         delay: Delay between auto-advance steps in seconds.
         show_all_regs: Show all 32 registers vs only changed.
         show_all_mem: Show non-zero memory vs all memory.
@@ -52,7 +78,25 @@ class ViewState:
         command_buffer: Current command being typed.
         marks: Dictionary of named position marks.
         status_msg: Current status message to display.
-        status_time: Timestamp when status message was set.
+        status_time: time.monotonic() when the status message was set.
+        frame: Rows written by the last draw_step call, used to repaint
+            only the rows that changed. Set to None to force a full redraw.
+        mem_scroll_max: Largest memory scroll offset in the last drawn
+            frame, shown in the footer.
+        entries: Recently read trace entries, reused when the next frame
+            shows a neighbouring step.
+        diffs: LRU cache of per-step changes (see _step_diff), so redrawing
+            a step does not compare it against its predecessor again.
+        mem_keys: LRU cache of each step's sorted non-zero memory addresses
+            (see _sorted_mem_keys).
+        windows: LRU cache of each step's displayed memory bytes and
+            change mask (see _memory_window), reused while scrolling.
+        sources: Source listing rows per highlighted line (see
+            _source_window), reused whenever a step shows the same line.
+        arrays: Register and SREG values of the whole trace as NumPy arrays
+            (see _trace_arrays), built on the first search command.
+        writes: Memory writes of the whole trace sorted by address (see
+            _memory_table), built on the first memory search command.
     """
 
     step_idx: int = 0
@@ -67,6 +111,15 @@ class ViewState:
     marks: dict[str, int] = field(default_factory=dict)
     status_msg: str = ""
     status_time: float = 0.0
+    frame: Any = field(default=None, repr=False, compare=False)
+    mem_scroll_max: int = field(default=0, repr=False, compare=False)
+    entries: Any = field(default=None, repr=False, compare=False)
+    diffs: Any = field(default=None, repr=False, compare=False)
+    mem_keys: Any = field(default=None, repr=False, compare=False)
+    windows: Any = field(default=None, repr=False, compare=False)
+    sources: Any = field(default=None, repr=False, compare=False)
+    arrays: Any = field(default=None, repr=False, compare=False)
+    writes: Any = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -81,10 +134,27 @@ class KeyContext:
     mem_addr_end: int
     source_lines: list[str] | None
     n: int  # total steps
-
-    def redraw(self) -> int:
-        """Redraw screen and return height."""
-        return draw_step(
+    # While deferred, redraw() only notes that a frame is due; flush() then
+    # draws it once after a batch of queued keys has been applied.
+    deferred: bool = False
+    pending: bool = False
+    pending_status: bool = False
+    height: int = 0  # value returned by the last draw_step call
+
+    def redraw(self, full: bool = False) -> int:
+        """Redraw screen and return height.
+
+        Args:
+            full: Repaint every row, e.g. after another view drew over the
+                screen. Otherwise only rows that changed are rewritten.
+        """
+        if full:
+            self.state.frame = None
+        if self.deferred:
+            self.pending = True
+            return self.height
+        self.pending = self.pending_status = False
+        self.height = draw_step(
             self.scr,
             self.state,
             self.traces,
@@ -93,11 +163,73 @@ class KeyContext:
             self.mem_addr_end,
             self.source_lines,
         )
+        return self.height
+
+    def redraw_status(self) -> int:
+        """Redraw only the status/command line and return height.
+
+        The other rows of the last frame are reused as they are; without a
+        usable previous frame the whole screen is redrawn.
+        """
+        if self.deferred:
+            self.pending_status = True
+            return self.height
+        self.pending_status = False
+        if not _redraw_status(self.scr, self.state):
+            return self.redraw()
+        return self.height
+
+    def flush(self) -> int:
+        """Draw the frame requested while redraws were deferred, if any."""
+        if self.pending:
+            return self.redraw()
+        if self.pending_status:
+            return self.redraw_status()
+        return self.height
 
     def set_status(self, msg: str) -> None:
         """Set status message."""
         self.state.status_msg = msg
-        self.state.status_time = time.time()
+        self.state.status_time = time.monotonic()
+
+
+# Two-digit hex text and printable-ASCII glyph for every byte value. The
+# tuples serve single-byte lookups; whole rows of memory bytes are mapped to
+# glyphs with bytes.translate and to hex with bytes.hex().
+_HEX = tuple(f"{i:02X}" for i in range(256))
+_ASCII = tuple(chr(i) if 32 <= i <= 126 else "." for i in range(256))
+_ASCII_BYTES = "".join(_ASCII).encode("ascii")
+
+# Frame-invariant labels, built once instead of on every draw_step call.
+_SREG_FLAG_NAMES = ("I", "T", "H", "S", "V", "N", "Z", "C")
+# SREG row cells for every status value: one ("N:b ", b) pair per flag,
+# most significant bit first, so drawing needs no shifting or formatting.
+_SREG_CELLS = tuple(
+    tuple(
+        (f"{name}:{(value >> (7 - i)) & 1} ", (value >> (7 - i)) & 1)
+        for i, name in enumerate(_SREG_FLAG_NAMES)
+    )
+    for value in range(256)
+)
+_REG_ROW_LABELS = tuple(f"R{base:02d}-{base + 15:02d}: " for base in (0, 16))
+
+# Display attributes, set by _init_attrs() once the color pairs exist.
+# Until then everything is drawn with the normal attribute.
+_ATTR_TITLE = 0  # White bold: headers, section titles, command line
+_ATTR_LABEL = 0  # White: row labels
+_ATTR_CHANGED = 0  # Black on green: values changed by the last step
+_ATTR_ACTIVE = 0  # Green bold: set flags, status messages, [PLAY]
+_ATTR_VALUE = 0  # Green: non-zero values
+
+
+def _init_attrs() -> None:
+    """Bind the display attributes to the initialized color pairs."""
+    global _ATTR_TITLE, _ATTR_LABEL, _ATTR_CHANGED, _ATTR_ACTIVE, _ATTR_VALUE
+    _ATTR_TITLE = curses.color_pair(3) | curses.A_BOLD
+    _ATTR_LABEL = curses.color_pair(3)
+    _ATTR_CHANGED = curses.color_pair(1) | curses.A_BOLD
+    _ATTR_ACTIVE = curses.color_pair(2) | curses.A_BOLD
+    _ATTR_VALUE = curses.color_pair(2)
 
 
 def format_byte(value: int) -> str:
@@ -109,13 +241,17 @@ def format_byte(value: int) -> str:
     Returns:
         Two-character uppercase hex string.
     """
+    if 0 <= value <= 0xFF:
+        return _HEX[value]
     return f"{value:02X}"
 
 
-def safe_add(
-    scr, y: int, x: int, text: str, attr: int = 0, max_x: int | None = None
-) -> None:
-    """Safely add text to screen, handling boundary conditions.
+def safe_add(scr, y: int, x: int, text: str, attr: int, max_y: int, max_x: int) -> None:
+    """Add text to the screen, clipped to its bounds.
+
+    Text that would reach the last column is cut off (so curses never
+    scrolls), and rows outside the screen are skipped without touching
+    curses. The screen size is passed in so a frame reads it only once.
 
     Args:
         scr: Curses screen object.
@@ -123,18 +259,609 @@ def safe_add(
         x: X coordinate (column).
         text: Text to display.
         attr: Display attributes (e.g., curses.A_BOLD).
-        max_x: Maximum x coordinate, or None to use screen width.
+        max_y: Screen height.
+        max_x: Maximum x coordinate.
+    """
+    end = max_x - x - 1
+    if end > 0 and 0 <= y < max_y:
+        scr.addstr(y, x, text[:end], attr)
+
+
+def _byte_array(values, size: int) -> np.ndarray:
+    """Return byte values as a zero-padded uint8 array.
+
+    Args:
+        values: Sequence of byte values or a bytes object (may be shorter
+            than ``size``).
+        size: Length of the returned array.
+
+    Returns:
+        Array of ``size`` bytes, with missing trailing values set to zero.
+    """
+    import numpy as np
+
+    arr = np.zeros(size, dtype=np.uint8)
+    n = min(size, len(values))
+    if isinstance(values, (bytes, bytearray)):
+        values = np.frombuffer(values, dtype=np.uint8)
+    arr[:n] = values[:n]
+    return arr
+
+
+def _window_array(mem: dict[int, int], start: int, size: int) -> np.ndarray:
+    """Return a memory window from a sparse snapshot as a uint8 array.
+
+    Args:
+        mem: Mapping of address to non-zero byte value.
+        start: First address of the window.
+        size: Number of bytes in the window.
+
+    Returns:
+        Array where index ``i`` holds the value at ``start + i``.
+    """
+    import numpy as np
+
+    arr = np.zeros(size, dtype=np.uint8)
+    for addr, val in mem.items():
+        off = addr - start
+        if 0 <= off < size:
+            arr[off] = val
+    return arr
+
+
+@functools.lru_cache(maxsize=8)
+def _mem_row_layout(mem_start: int, mem_end: int) -> tuple[tuple[str, int], ...]:
+    """Return the hex-dump row labels for a memory range.
+
+    The layout only depends on the displayed range, so it is computed once
+    per range rather than on every frame.
+
+    Args:
+        mem_start: First displayed address.
+        mem_end: Last displayed address (inclusive).
+
+    Returns:
+        One ``(label, offset)`` pair per 16-byte row, where ``offset`` is the
+        row's first byte relative to ``mem_start``.
+    """
+    return tuple(
+        (f"0x{row_addr:04X}: ", row_addr - mem_start)
+        for row_addr in range(mem_start, mem_end + 1, 16)
+    )
+
+
+def _draw_hex_row(
+    scr,
+    y: int,
+    x: int,
+    vals: np.ndarray,
+    changed: np.ndarray,
+    max_y: int,
+    max_x: int,
+    suffix: str = "",
+) -> None:
+    """Draw bytes as one space-separated hex string, then highlight cells.
+
+    The whole row is written once in the normal attribute; only changed
+    (green background) and non-zero (green text) bytes are redrawn. Each
+    run of adjacent unchanged non-zero bytes is redrawn with one joined
+    string, since a space in green text looks the same as a plain one.
+    Changed bytes are drawn one by one so their background stays off the
+    separators.
+
+    Args:
+        scr: Curses screen object.
+        y: Row to draw on.
+        x: Column of the first byte.
+        vals: Byte values for the row.
+        changed: Boolean mask of bytes that changed since the previous step.
+        max_y: Screen height.
+        max_x: Maximum x coordinate.
+        suffix: Normal-attribute text written in the same call, directly
+            after the hex bytes.
     """
-    if max_x is None:
-        _, max_x = scr.getmaxyx()
-    if y < 0 or y >= scr.getmaxyx()[0]:
+    # Byte i occupies text[3 * i : 3 * i + 2].
+    text = vals.tobytes().hex(" ").upper()
+    safe_add(scr, y, x, text + suffix, 0, max_y, max_x)
+    if not (changed.any() or vals.any()):
         return
-    # Truncate text to fit within screen bounds
-    text = text[: max_x - x - 1] if x < max_x else ""
-    try:
-        scr.addstr(y, x, text, attr)
-    except curses.error:
-        pass
+    nonzero, changed = (vals != 0).tolist(), changed.tolist()
+    col, n = 0, len(nonzero)
+    while col < n:
+        if changed[col]:
+            cell = text[col * 3 : col * 3 + 2]
+            safe_add(scr, y, x + col * 3, cell, _ATTR_CHANGED, max_y, max_x)
+            col += 1
+        elif nonzero[col]:
+            end = col + 1
+            while end < n and nonzero[end] and not changed[end]:
+                end += 1
+            run = text[col * 3 : end * 3 - 1]
+            safe_add(scr, y, x + col * 3, run, _ATTR_VALUE, max_y, max_x)
+            col = end
+        else:
+            col += 1
+
+
+# Seconds a status message stays on the status line.
+_STATUS_DURATION = 0.5
+
+# Most queued keys applied before a frame is drawn.
+_MAX_KEYS_PER_FRAME = 64
+
+# How long m and ' wait for the mark name, in milliseconds.
+_MARK_TIMEOUT_MS = 2000
+
+# Number of trace entries and per-step diffs kept on ViewState.
+_ENTRY_CACHE_SIZE = 4
+_DIFF_CACHE_SIZE = 128
+
+
+def _trace_entry(state: ViewState, traces, idx: int) -> dict:
+    """Return trace entry ``idx``, reusing recently read entries.
+
+    Building an entry rebuilds its memory snapshot, so the last few entries
+    are kept on ``state``: stepping forward turns the current entry into the
+    next frame's previous one.
+
+    Args:
+        state: View state caching recent entries.
+        traces: Trace sequence being displayed.
+        idx: Entry index.
+
+    Returns:
+        The trace entry.
+    """
+    cached = state.entries
+    if cached is None or cached[0] is not traces:
+        cached = state.entries = (traces, OrderedDict())
+    entries = cached[1]
+    entry = entries.get(idx)
+    if entry is None:
+        entry = entries[idx] = traces[idx]
+        if len(entries) > _ENTRY_CACHE_SIZE:
+            entries.popitem(last=False)
+    else:
+        entries.move_to_end(idx)
+    return entry
+
+
+def _compute_diff(entry: dict, prev: dict | None) -> tuple:
+    """Compare a trace entry with the previous one.
+
+    Args:
+        entry: Trace entry of the displayed step.
+        prev: Entry of the step before it, or None for the first step.
+
+    Returns:
+        Tuple ``(changed_regs, changed_mem, sreg_xor)``: ``(reg, old, new)``
+        for every changed register, the set of changed memory addresses and
+        the changed SREG bits. All empty when there is no previous entry.
+    """
+    if not prev:
+        return (), frozenset(), 0
+    regs, prev_regs = entry.get("regs", []), prev.get("regs", [])
+    changed_regs = tuple(
+        (r, old, new)
+        for r in range(32)
+        if (old := prev_regs[r] if r < len(prev_regs) else 0)
+        != (new := regs[r] if r < len(regs) else 0)
+    )
+    mem, prev_mem = entry.get("mem", {}), prev.get("mem", {})
+    changed_mem = frozenset(
+        a for a in mem.keys() | prev_mem.keys() if mem.get(a, 0) != prev_mem.get(a, 0)
+    )
+    sreg_xor = (entry.get("sreg", 0) ^ prev.get("sreg", 0)) & 0xFF
+    return changed_regs, changed_mem, sreg_xor
+
+
+def _step_diff(state: ViewState, traces, idx: int) -> tuple:
+    """Return the cached _compute_diff result for step ``idx``.
+
+    Diffs only depend on the step, so they are kept in an LRU cache on
+    ``state`` that is dropped when a different trace is displayed.
+
+    Args:
+        state: View state holding the diff cache.
+        traces: Trace sequence being displayed.
+        idx: Index of the step.
+
+    Returns:
+        The ``(changed_regs, changed_mem, sreg_xor)`` tuple for the step.
+    """
+    cached = state.diffs
+    if cached is None or cached[0] is not traces:
+        cached = state.diffs = (traces, OrderedDict())
+    diffs = cached[1]
+    diff = diffs.get(idx)
+    if diff is None:
+        prev = _trace_entry(state, traces, idx - 1) if idx > 0 else None
+        diff = diffs[idx] = _compute_diff(_trace_entry(state, traces, idx), prev)
+        if len(diffs) > _DIFF_CACHE_SIZE:
+            diffs.popitem(last=False)
+    else:
+        diffs.move_to_end(idx)
+    return diff
+
+
+# Source lines shown above and below the current one.
+_SOURCE_CONTEXT_LINES = 5
+
+
+def _source_window(state: ViewState, source_lines: list[str], line_num: int) -> tuple:
+    """Return the source listing rows shown around a source line.
+
+    Rows only depend on the highlighted line, so they are formatted once per
+    line and kept on ``state``; the cache is dropped when different source
+    lines are displayed.
+
+    Args:
+        state: View state caching formatted windows.
+        source_lines: Assembly source lines.
+        line_num: Index of the current source line, or -1 if unknown.
+
+    Returns:
+        Tuple of ``(text, is_current)`` rows, including blank padding rows
+        that keep the listing a fixed height near the start and end of the
+        file.
+    """
+    cached = state.sources
+    if cached is None or cached[0] is not source_lines:
+        cached = state.sources = (source_lines, {})
+    windows = cached[1]
+    rows = windows.get(line_num)
+    if rows is None:
+        context = _SOURCE_CONTEXT_LINES
+        start = max(0, line_num - context)
+        end = min(len(source_lines), line_num + context + 1)
+        rows = [("", False)] * max(0, context - (line_num - start))
+        for src_idx in range(start, end):
+            prefix = ">>>" if src_idx == line_num else "   "
+            text = f"{prefix} {src_idx + 1:3d}: {source_lines[src_idx].rstrip()}"
+            rows.append((text, src_idx == line_num))
+        rows += [("", False)] * max(0, context - (end - line_num - 1))
+        rows = windows[line_num] = tuple(rows)
+    return rows
+
+
+def _trace_column(traces, key: str, default) -> list:
+    """Return one field of every trace entry.
+
+    A StepTrace hands out its stored column directly, so no memory
+    snapshots are rebuilt; other sequences are read entry by entry.
+
+    Args:
+        traces: Trace sequence being displayed.
+        key: Entry key to read.
+        default: Value used for entries without ``key``.
+
+    Returns:
+        Per-step values, in step order.
+    """
+    if isinstance(traces, StepTrace):
+        return traces.column(key)
+    return [t.get(key, default) for t in traces]
+
+
+def _trace_arrays(state: ViewState, traces) -> tuple:
+    """Return the registers and SREG of every step as NumPy arrays.
+
+    The arrays are built once per trace and kept on ``state``, so register
+    and flag searches compare whole columns instead of looping over entries.
+
+    Args:
+        state: View state caching the arrays.
+        traces: Trace sequence being displayed.
+
+    Returns:
+        Tuple ``(regs, reg_counts, sregs)``: an ``(n, 32)`` uint8 array of
+        register values (missing registers read as zero), the number of
+        registers each entry recorded, and an ``(n,)`` uint8 SREG array.
+    """
+    import numpy as np
+
+    cached = state.arrays
+    if cached is None or cached[0] is not traces:
+        if isinstance(traces, StepTrace):
+            # the trace already keeps its registers as one (n, 32) buffer
+            n = len(traces)
+            regs = np.frombuffer(traces.register_bytes(), dtype=np.uint8)
+            regs = regs.reshape(n, 32)
+            reg_counts = np.full(n, 32, dtype=np.intp)
+        else:
+            reg_lists = _trace_column(traces, "regs", ())
+            n = len(reg_lists)
+            reg_counts = np.fromiter(map(len, reg_lists), dtype=np.intp, count=n)
+            if n and (reg_counts == 32).all():
+                try:
+                    # entries recording registers as bytes
+                    joined = b"".join(reg_lists)
+                    regs = np.frombuffer(joined, dtype=np.uint8).reshape(n, 32)
+                except TypeError:
+                    regs = np.array(reg_lists, dtype=np.uint8)
+            else:
+                regs = np.zeros((n, 32), dtype=np.uint8)
+                for i, values in enumerate(reg_lists):
+                    regs[i] = _byte_array(values, 32)
+        sregs = np.array(_trace_column(traces, "sreg", 0), dtype=np.uint8)
+        cached = state.arrays = (traces, (regs, reg_counts, sregs))
+    return cached[1]
+
+
+def _memory_writes(traces) -> list[tuple[int, int, int]]:
+    """Return ``(step, addr, value)`` for every memory change in a trace.
+
+    A StepTrace replays its write log; other sequences are compared entry
+    by entry. Bytes that are non-zero in the first entry count as written
+    at step 0.
+
+    Args:
+        traces: Trace sequence being displayed.
+
+    Returns:
+        Changes in ascending step order.
+    """
+    if isinstance(traces, StepTrace):
+        return traces.memory_writes()
+    writes = []
+    prev: dict[int, int] = {}
+    for step, entry in enumerate(traces):
+        mem = entry.get("mem", {})
+        for addr in mem.keys() | prev.keys():
+            if (val := mem.get(addr, 0)) != prev.get(addr, 0):
+                writes.append((step, addr, val))
+        prev = mem
+    return writes
+
+
+def _memory_table(state: ViewState, traces) -> np.ndarray:
+    """Return the trace's memory writes as one array sorted by address.
+
+    The table is built once per trace and kept on ``state``. Rows are
+    ``(addr, step, value)`` ordered by address, then step, with one row per
+    address and step (the last write wins), so the history of a single
+    address is a contiguous slice found with a binary search.
+
+    Args:
+        state: View state caching the table.
+        traces: Trace sequence being displayed.
+
+    Returns:
+        ``(k, 3)`` int64 array of ``(addr, step, value)`` rows.
+    """
+    import numpy as np
+
+    cached = state.writes
+    if cached is None or cached[0] is not traces:
+        writes = np.array(_memory_writes(traces), dtype=np.int64).reshape(-1, 3)
+        table = writes[:, [1, 0, 2]]
+        # Stable sort keeps same-step writes in order, so the last one is
+        # the value the next entry shows.
+        table = table[np.lexsort((table[:, 1], table[:, 0]))]
+        last = np.ones(len(table), dtype=bool)
+        last[:-1] = (table[1:, :2] != table[:-1, :2]).any(axis=1)
+        cached = state.writes = (traces, table[last])
+    return cached[1]
+
+
+def _address_history(table: np.ndarray, addr: int) -> tuple:
+    """Return the steps at which ``addr`` was written and the values.
+
+    Args:
+        table: Result of _memory_table.
+        addr: Memory address.
+
+    Returns:
+        Tuple ``(steps, values)`` of ascending steps and the value the
+        address holds from each of them on. Before the first step the
+        address holds zero.
+    """
+    import numpy as np
+
+    lo, hi = np.searchsorted(table[:, 0], (addr, addr + 1))
+    return table[lo:hi, 1], table[lo:hi, 2]
+
+
+def _first_match(mask: np.ndarray) -> int:
+    """Return the index of the first True in ``mask``, or -1 if none."""
+    idx = int(mask.argmax()) if mask.size else 0
+    return idx if mask.size and mask[idx] else -1
+
+
+def _sorted_mem_keys(state: ViewState, traces, idx: int) -> list[int]:
+    """Return the sorted non-zero memory addresses of step ``idx``.
+
+    The list covers the whole snapshot, so the displayed range is sliced
+    out with a binary search and changing the range needs no re-sort. Lists
+    are kept in an LRU cache on ``state`` like the per-step diffs.
+
+    Args:
+        state: View state holding the cache.
+        traces: Trace sequence being displayed.
+        idx: Index of the step.
+
+    Returns:
+        Ascending addresses present in the step's memory snapshot.
+    """
+    cached = state.mem_keys
+    if cached is None or cached[0] is not traces:
+        cached = state.mem_keys = (traces, OrderedDict())
+    lists = cached[1]
+    keys = lists.get(idx)
+    if keys is None:
+        keys = lists[idx] = sorted(_trace_entry(state, traces, idx).get("mem", {}))
+        if len(lists) > _DIFF_CACHE_SIZE:
+            lists.popitem(last=False)
+    else:
+        lists.move_to_end(idx)
+    return keys
+
+
+def _memory_window(
+    state: ViewState, traces, idx: int, mem_start: int, mem_end: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the displayed memory bytes of step ``idx`` and their changes.
+
+    Scrolling redraws the same step with another slice of this window, so
+    windows are kept in an LRU cache on ``state`` keyed by step and range.
+
+    Args:
+        state: View state holding the cache.
+        traces: Trace sequence being displayed.
+        idx: Index of the step.
+        mem_start: First displayed address.
+        mem_end: Last displayed address (inclusive).
+
+    Returns:
+        Tuple ``(vals, changed)``: uint8 bytes of the range and a boolean
+        mask of the bytes that changed since the previous step.
+    """
+    import numpy as np
+
+    cached = state.windows
+    if cached is None or cached[0] is not traces:
+        cached = state.windows = (traces, OrderedDict())
+    windows = cached[1]
+    key = (idx, mem_start, mem_end)
+    window = windows.get(key)
+    if window is None:
+        size = max(0, mem_end - mem_start + 1)
+        mem = _trace_entry(state, traces, idx).get("mem", {})
+        vals = _window_array(mem, mem_start, size)
+        changed = np.zeros(size, dtype=bool)
+        for addr in _step_diff(state, traces, idx)[1]:
+            if 0 <= addr - mem_start < size:
+                changed[addr - mem_start] = True
+        window = windows[key] = (vals, changed)
+        if len(windows) > _DIFF_CACHE_SIZE:
+            windows.popitem(last=False)
+    else:
+        windows.move_to_end(key)
+    return window
+
+
+def _cells(ops: list[tuple[int, str, int]], width: int) -> tuple[list, list]:
+    """Compose a row's addstr ops into per-cell characters and attributes.
+
+    Args:
+        ops: ``(x, text, attr)`` writes in drawing order.
+        width: Row width in cells.
+
+    Returns:
+        Tuple ``(chars, attrs)`` of lists with one entry per cell; cells not
+        written are blank with attribute 0, as after an erase.
+    """
+    chars, attrs = [" "] * width, [0] * width
+    for x, text, attr in ops:
+        end = min(x + len(text), width)
+        if end > x:
+            chars[x:end] = text[: end - x]
+            attrs[x:end] = [attr] * (end - x)
+    return chars, attrs
+
+
+def _cell_exact(ops: list[tuple[int, str, int]]) -> bool:
+    """Return True if every op occupies exactly one cell per character.
+
+    Tabs, control characters and non-ASCII text (which may be double
+    width) can make curses place text differently from _cells().
+    """
+    return all(text.isascii() and text.isprintable() for _, text, _ in ops)
+
+
+class _FrameBuffer:
+    """Back buffer that records draw_step output row by row.
+
+    Every addstr call is stored as an ``(x, text, attr)`` op on its row. A
+    finished frame is compared with the previously presented one and only
+    the runs of cells that changed are sent to curses, so an unchanged
+    frame costs no curses calls at all and a one-byte change rewrites a
+    single cell.
+
+    Args:
+        scr: Curses screen the frame will be presented on.
+        size: Screen size, if already known; read from ``scr`` otherwise.
+    """
+
+    def __init__(self, scr, size: tuple[int, int] | None = None):
+        self.scr = scr
+        self.size = size or scr.getmaxyx()
+        self.rows: list[list[tuple[int, str, int]]] = [[] for _ in range(self.size[0])]
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return self.size
+
+    def addstr(self, y: int, x: int, text: str, attr: int = 0) -> None:
+        self.rows[y].append((x, text, attr))
+
+    def present(self, state: ViewState) -> None:
+        """Write what changed since the last frame and update the terminal.
+
+        The screen is erased and fully repainted when there is no previous
+        frame for this screen and size (first draw, resize, or after
+        ``state.frame`` was reset). Rows whose text curses may not lay out
+        one cell per character are rewritten whole. Changes are flushed
+        with a single ``noutrefresh``/``doupdate`` pair, which is skipped
+        when nothing changed.
+
+        Args:
+            state: View state holding the previously presented frame.
+        """
+        scr, rows = self.scr, self.rows
+        addstr = scr.addstr
+        last = state.frame
+        if last is None or last[0] is not scr or last[1] != self.size:
+            scr.erase()
+            last_rows = None
+        else:
+            last_rows = last[2]
+        dirty = last_rows is None
+        for y, ops in enumerate(rows):
+            if last_rows is not None:
+                old = last_rows[y]
+                if ops == old:
+                    continue
+                dirty = True
+                if _cell_exact(ops) and _cell_exact(old):
+                    self._write_changed_runs(y, old, ops)
+                    continue
+                scr.move(y, 0)
+                scr.clrtoeol()
+            for x, text, attr in ops:
+                try:
+                    addstr(y, x, text, attr)
+                except curses.error:
+                    pass
+        if dirty:
+            # Stage the window and flush the whole frame in one update.
+            scr.noutrefresh()
+            curses.doupdate()
+        state.frame = (scr, self.size, rows)
+
+    def _write_changed_runs(self, y: int, old: list, new: list) -> None:
+        """Rewrite only the cells of row ``y`` that differ between frames.
+
+        Consecutive changed cells with the same new attribute are written
+        with one addstr call.
+        """
+        width = self.size[1]
+        old_chars, old_attrs = _cells(old, width)
+        chars, attrs = _cells(new, width)
+        i = 0
+        while i < width:
+            if chars[i] == old_chars[i] and attrs[i] == old_attrs[i]:
+                i += 1
+                continue
+            attr, j = attrs[i], i + 1
+            while j < width and attrs[j] == attr:
+                if chars[j] == old_chars[j] and old_attrs[j] == attr:
+                    break
+                j += 1
+            try:
+                self.scr.addstr(y, i, "".join(chars[i:j]), attr)
+            except curses.error:
+                pass
+            i = j
 
 
 def draw_step(
@@ -150,6 +877,7 @@ def draw_step(
 
     Displays header, SREG flags, assembly source code, registers, and memory for the current step.
     Highlights changes from previous step and the currently executing source line.
+    Only screen rows that differ from the previously drawn frame are rewritten.
 
     Args:
         scr: Curses screen object.
@@ -163,18 +891,19 @@ def draw_step(
     Returns:
         Total number of lines drawn (for scroll calculations).
     """
+    import numpy as np
+
+    # Record the frame first; present() then writes only the changed rows.
+    scr = _FrameBuffer(scr)
     max_y, max_x = scr.getmaxyx()
-    scr.erase()
 
     idx, mem_scroll, n = state.step_idx, state.scroll_offset, len(traces)
-    entry = traces[idx]
-    prev = traces[idx - 1] if idx > 0 else None
+    entry = _trace_entry(state, traces, idx)
+    changed_regs, changed_mem, sreg_xor = _step_diff(state, traces, idx)
 
     pc, sp = entry.get("pc", 0), entry.get("sp", 0)
     instr, sreg = entry.get("instr", ""), entry.get("sreg", 0)
-    prev_sreg = prev.get("sreg", 0) if prev else 0
-    regs, prev_regs = entry.get("regs", []), prev.get("regs", []) if prev else []
-    mem, prev_mem = entry.get("mem", {}), prev.get("mem", {}) if prev else {}
+    regs, mem = entry.get("regs", []), entry.get("mem", {})
 
     line = 0
 
@@ -184,7 +913,8 @@ def draw_step(
         line,
         0,
         f"Step {idx}/{n - 1}  PC:0x{pc:04X}  SP:0x{sp:04X}  {instr}",
-        curses.color_pair(3) | curses.A_BOLD,
+        _ATTR_TITLE,
+        max_y,
         max_x,
     )
     line += 2
@@ -197,61 +927,29 @@ def draw_step(
             line,
             0,
             "Assembly Source:",
-            curses.color_pair(3) | curses.A_BOLD,
+            _ATTR_TITLE,
+            max_y,
             max_x,
         )
         line += 1
 
-        context_lines = 5
-        start_line = max(0, source_line_num - context_lines)
-        end_line = min(len(source_lines), source_line_num + context_lines + 1)
-
-        lines_before = source_line_num - start_line
-        lines_after = end_line - source_line_num - 1
-
-        padding_before = max(0, context_lines - lines_before)
-        padding_after = max(0, context_lines - lines_after)
-
-        for _ in range(padding_before):
-            safe_add(scr, line, 2, "", 0, max_x)
-            line += 1
-
-        for src_idx in range(start_line, end_line):
-            if src_idx < len(source_lines):
-                prefix = ">>>" if src_idx == source_line_num else "   "
-                src_text = source_lines[src_idx].rstrip()
-                display_text = f"{prefix} {src_idx + 1:3d}: {src_text}"
-                if src_idx == source_line_num:
-                    attr = curses.color_pair(1) | curses.A_BOLD
-                else:
-                    attr = 0
-                safe_add(scr, line, 2, display_text, attr, max_x)
-                line += 1
-
-        for _ in range(padding_after):
-            safe_add(scr, line, 2, "", 0, max_x)
+        for text, current in _source_window(state, source_lines, source_line_num):
+            safe_add(scr, line, 2, text, _ATTR_CHANGED if current else 0, max_y, max_x)
             line += 1
 
         line += 1
 
-    flags = ["I", "T", "H", "S", "V", "N", "Z", "C"]
-    safe_add(scr, line, 0, "SREG: ", curses.color_pair(3) | curses.A_BOLD, max_x)
+    safe_add(scr, line, 0, "SREG: ", _ATTR_TITLE, max_y, max_x)
     x = 6
-    for i, name in enumerate(flags):
-        bit_pos = 7 - i
-        bit, pbit = (sreg >> bit_pos) & 1, (prev_sreg >> bit_pos) & 1
-        if bit != pbit and prev:
-            # Changed flag: green background
-            attr = curses.color_pair(1) | curses.A_BOLD
-        elif bit == 1:
-            # Set flag: green text to indicate active
-            attr = curses.color_pair(2) | curses.A_BOLD
-        else:
-            # Cleared flag: normal text
-            attr = 0
-        safe_add(scr, line, x, f"{name}:{bit} ", attr, max_x)
+    # Flag attribute indexed by (changed << 1) | set: cleared flags use
+    # normal text, set flags green text, changed flags a green background.
+    flag_attrs = (0, _ATTR_ACTIVE, _ATTR_CHANGED, _ATTR_CHANGED)
+    changed_bits = sreg_xor << 1
+    for i, (text, bit) in enumerate(_SREG_CELLS[sreg & 0xFF]):
+        attr = flag_attrs[(changed_bits >> (7 - i)) & 2 | bit]
+        safe_add(scr, line, x, text, attr, max_y, max_x)
         x += 4
-    safe_add(scr, line, x + 2, f"0x{sreg:02X}", curses.color_pair(2), max_x)
+    safe_add(scr, line, x + 2, "0x" + _HEX[sreg], _ATTR_VALUE, max_y, max_x)
     line += 2
 
     # Registers (fixed)
@@ -260,64 +958,52 @@ def draw_step(
         line,
         0,
         f"Registers ({'all' if state.show_all_regs else 'changed'}):",
-        curses.color_pair(3) | curses.A_BOLD,
+        _ATTR_TITLE,
+        max_y,
         max_x,
     )
     line += 1
 
     if state.show_all_regs:
+        reg_vals = _byte_array(regs, 32)
+        reg_changed = np.zeros(32, dtype=bool)
+        reg_changed[[r for r, _, _ in changed_regs]] = True
         for row in range(2):
             base = row * 16
             safe_add(
                 scr,
                 line,
                 2,
-                f"R{base:02d}-{base + 15:02d}: ",
-                curses.color_pair(3),
+                _REG_ROW_LABELS[row],
+                _ATTR_LABEL,
+                max_y,
+                max_x,
+            )
+            _draw_hex_row(
+                scr,
+                line,
+                12,
+                reg_vals[base : base + 16],
+                reg_changed[base : base + 16],
+                max_y,
                 max_x,
             )
-            for col in range(16):
-                r = base + col
-                if r >= 32:
-                    break
-                val = regs[r] if r < len(regs) else 0
-                pval = prev_regs[r] if r < len(prev_regs) else 0
-                if val != pval and prev:
-                    # Changed register: green background
-                    attr = curses.color_pair(1) | curses.A_BOLD
-                elif val != 0:
-                    # Non-zero register: green text
-                    attr = curses.color_pair(2)
-                else:
-                    # Zero register: normal text
-                    attr = 0
-                safe_add(scr, line, 12 + col * 3, format_byte(val), attr, max_x)
             line += 1
     else:
-        changed = [
-            (
-                r,
-                prev_regs[r] if r < len(prev_regs) else 0,
-                regs[r] if r < len(regs) else 0,
-            )
-            for r in range(32)
-            if (regs[r] if r < len(regs) else 0)
-            != (prev_regs[r] if r < len(prev_regs) else 0)
-            and prev
-        ]
-        if changed:
-            for r, old, new in changed:
+        if changed_regs:
+            for r, old, new in changed_regs:
                 safe_add(
                     scr,
                     line,
                     2,
-                    f"R{r:02d}: {format_byte(old)} → {format_byte(new)}",
-                    curses.color_pair(1) | curses.A_BOLD,
+                    f"R{r:02d}: {_HEX[old]} → {_HEX[new]}",
+                    _ATTR_CHANGED,
+                    max_y,
                     max_x,
                 )
                 line += 1
         else:
-            safe_add(scr, line, 2, "(no changes)", 0, max_x)
+            safe_add(scr, line, 2, "(no changes)", 0, max_y, max_x)
             line += 1
     line += 1
 
@@ -327,7 +1013,8 @@ def draw_step(
         line,
         0,
         f"Memory {hex(mem_start)}..{hex(mem_end)} ({'non-zero' if state.show_all_mem else 'all'}):",
-        curses.color_pair(3) | curses.A_BOLD,
+        _ATTR_TITLE,
+        max_y,
         max_x,
     )
     line += 1
@@ -339,38 +1026,24 @@ def draw_step(
     # Build memory lines
     mem_lines = []
     if state.show_all_mem:
-        nz = [(a, v) for a, v in mem.items() if mem_start <= a <= mem_end]
-        nz.sort()
-        if nz:
-            for addr, val in nz:
-                pval = prev_mem.get(addr, 0)
-                if val != pval and prev:
+        keys = _sorted_mem_keys(state, traces, idx)
+        lo = bisect.bisect_left(keys, mem_start)
+        hi = bisect.bisect_right(keys, mem_end, lo)
+        if lo < hi:
+            for addr in keys[lo:hi]:
+                val = mem[addr]
+                if addr in changed_mem:
                     # Changed memory: green background
-                    attr = curses.color_pair(1) | curses.A_BOLD
+                    attr = _ATTR_CHANGED
                 else:
                     # Non-zero memory: green text
-                    attr = curses.color_pair(2)
-                ch = chr(val) if 32 <= val <= 126 else "."
-                mem_lines.append((f"0x{addr:04X}: {format_byte(val)}  '{ch}'", attr))
+                    attr = _ATTR_VALUE
+                mem_lines.append((f"0x{addr:04X}: {_HEX[val]}  '{_ASCII[val]}'", attr))
         else:
             mem_lines.append(("(all zero)", 0))
     else:
-        for row in range((mem_end - mem_start + 16) // 16):
-            row_addr = mem_start + row * 16
-            if row_addr > mem_end:
-                break
-            line_text = f"0x{row_addr:04X}: "
-            ascii_parts = []
-            highlights = []
-            for col in range(16):
-                addr = row_addr + col
-                if addr > mem_end:
-                    break
-                val, pval = mem.get(addr, 0), prev_mem.get(addr, 0) if prev else 0
-                if val != pval and prev:
-                    highlights.append((12 + col * 3, format_byte(val)))
-                ascii_parts.append(chr(val) if 32 <= val <= 126 else ".")
-            mem_lines.append((line_text, 0, highlights, ascii_parts))
+        mem_vals, mem_changed = _memory_window(state, traces, idx, mem_start, mem_end)
+        mem_lines = _mem_row_layout(mem_start, mem_end)
 
     # Render visible memory lines
     total_mem_lines = len(mem_lines)
@@ -385,35 +1058,43 @@ def draw_step(
         mem_line_data = mem_lines[mem_line_idx]
         if state.show_all_mem:
             text, attr = mem_line_data
-            safe_add(scr, scr_line, 2, text, attr, max_x)
+            safe_add(scr, scr_line, 2, text, attr, max_y, max_x)
         else:
-            line_text, attr, highlights, ascii_parts = mem_line_data
-            safe_add(scr, scr_line, 2, line_text, curses.color_pair(3), max_x)
-            # Draw hex bytes
-            row_addr = mem_start + mem_line_idx * 16
-            for col in range(16):
-                addr = row_addr + col
-                if addr > mem_end:
-                    break
-                val = mem.get(addr, 0)
-                pval = prev_mem.get(addr, 0) if prev else 0
-                if val != pval and prev:
-                    # Changed memory: green background
-                    attr = curses.color_pair(1) | curses.A_BOLD
-                elif val != 0:
-                    # Non-zero memory: green text
-                    attr = curses.color_pair(2)
-                else:
-                    # Zero memory: normal text
-                    attr = 0
-                safe_add(scr, scr_line, 12 + col * 3, format_byte(val), attr, max_x)
-            # Draw ASCII
-            safe_add(scr, scr_line, 12 + 48, "  " + "".join(ascii_parts), 0, max_x)
+            line_text, offset = mem_line_data
+            safe_add(scr, scr_line, 2, line_text, _ATTR_LABEL, max_y, max_x)
+            row_vals = mem_vals[offset : offset + 16]
+            # The ASCII column starts at x=62 and is written together with
+            # the hex bytes, padded past a short last row.
+            ascii_text = row_vals.tobytes().translate(_ASCII_BYTES).decode("ascii")
+            pad = " " * (51 - 3 * len(row_vals))
+            _draw_hex_row(
+                scr,
+                scr_line,
+                12,
+                row_vals,
+                mem_changed[offset : offset + 16],
+                max_y,
+                max_x,
+                pad + ascii_text,
+            )
+
+    state.mem_scroll_max = max(0, total_mem_lines - mem_available_lines)
+    _draw_status(scr, state, max_y, max_x)
 
-    # Status/Command line
+    scr.present(state)
+    return total_mem_lines
+
+
+def _draw_status(scr, state: ViewState, max_y: int, max_x: int) -> None:
+    """Draw the bottom line: command input, a status message or the footer.
+
+    Args:
+        scr: Screen or frame buffer to draw on.
+        state: Current view state.
+        max_y: Screen height.
+        max_x: Maximum x coordinate.
+    """
     status_line = max_y - 1
-    scr.move(status_line, 0)
-    scr.clrtoeol()
 
     if state.command_mode:
         # Command mode: white bold for visibility
@@ -422,38 +1103,57 @@ def draw_step(
             status_line,
             0,
             f":{state.command_buffer}",
-            curses.color_pair(3) | curses.A_BOLD,
+            _ATTR_TITLE,
+            max_y,
             max_x,
         )
     else:
         # Normal mode: show temporary status message or footer
-        if state.status_msg and time.time() - state.status_time < 0.5:
+        if state.status_msg and time.monotonic() - state.status_time < _STATUS_DURATION:
             # Status messages in green
             safe_add(
                 scr,
                 status_line,
                 0,
                 state.status_msg,
-                curses.color_pair(2) | curses.A_BOLD,
+                _ATTR_ACTIVE,
+                max_y,
                 max_x,
             )
         else:
             play = "[PLAY]" if state.playing else "[PAUSE]"
             info = f" Speed:{state.delay:.2f}s"
-            if mem_scroll > 0:
-                info += f" MemScroll:{mem_scroll}/{max(0, total_mem_lines - mem_available_lines)}"
+            if state.scroll_offset > 0:
+                info += f" MemScroll:{state.scroll_offset}/{state.mem_scroll_max}"
             info += " | / for help | q to quit"
             # Play/pause in green when active, white otherwise
-            play_attr = (
-                curses.color_pair(2) | curses.A_BOLD
-                if state.playing
-                else curses.color_pair(3) | curses.A_BOLD
-            )
-            safe_add(scr, status_line, 0, play, play_attr, max_x)
-            safe_add(scr, status_line, len(play), info, 0, max_x)
+            play_attr = _ATTR_ACTIVE if state.playing else _ATTR_TITLE
+            safe_add(scr, status_line, 0, play, play_attr, max_y, max_x)
+            safe_add(scr, status_line, len(play), info, 0, max_y, max_x)
 
-    scr.refresh()
-    return total_mem_lines
+
+def _redraw_status(scr, state: ViewState) -> bool:
+    """Repaint only the status line on top of the last presented frame.
+
+    Args:
+        scr: Curses screen object.
+        state: Current view state holding the last frame.
+
+    Returns:
+        False if there is no frame for this screen to reuse.
+    """
+    # curses only picks up a new terminal size when getch() returns
+    # KEY_RESIZE, which redraws in full, so the last frame's size is current.
+    last = state.frame
+    if last is None or last[0] is not scr:
+        return False
+    buf = _FrameBuffer(scr, last[1])
+    max_y, max_x = buf.size
+    buf.rows = list(last[2])
+    buf.rows[max_y - 1] = []
+    _draw_status(buf, state, max_y, max_x)
+    buf.present(state)
+    return True
 
 
 def show_help(scr) -> None:
@@ -465,7 +1165,7 @@ def show_help(scr) -> None:
     Args:
         scr: Curses screen object.
     """
-    scr.clear()
+    scr.erase()
     help_text = [
         "Tiny8 CLI - Help",
         "",
@@ -514,7 +1214,7 @@ def show_info(scr, entry: dict, idx: int) -> None:
         entry: Trace entry dictionary containing step data.
         idx: Step index number.
     """
-    scr.clear()
+    scr.erase()
     lines = [
         f"Step {idx} Details",
         "",
@@ -526,13 +1226,12 @@ def show_info(scr, entry: dict, idx: int) -> None:
     ]
     for i, v in enumerate(entry.get("regs", [])):
         if v:
-            lines.append(f"  R{i:02d} = 0x{v:02X} ({v})")
+            lines.append(f"  R{i:02d} = 0x{_HEX[v]} ({v})")
     lines.append("")
     lines.append("Non-zero memory:")
     for a in sorted(entry.get("mem", {}).keys()):
         v = entry["mem"][a]
-        ch = chr(v) if 32 <= v <= 126 else "."
-        lines.append(f"  0x{a:04X} = 0x{v:02X} ({v}) '{ch}'")
+        lines.append(f"  0x{a:04X} = 0x{_HEX[v]} ({v}) '{_ASCII[v]}'")
     lines.append("")
     lines.append("Press any key...")
 
@@ -547,6 +1246,215 @@ def show_info(scr, entry: dict, idx: int) -> None:
     scr.nodelay(True)
 
 
+@functools.lru_cache(maxsize=128)
+def _parse_int(text: str) -> int:
+    """Parse a decimal or ``0x``-prefixed hex command argument.
+
+    Cached because the same addresses and values tend to be typed again.
+
+    Args:
+        text: Argument text.
+
+    Returns:
+        The parsed integer.
+
+    Raises:
+        ValueError: If ``text`` is not a valid number.
+    """
+    return int(text, 16) if text.startswith("0x") else int(text)
+
+
+def _jump_relative(state: ViewState, traces, offset: int) -> str:
+    """Move ``offset`` steps from the current one (``+50``, ``-20``)."""
+    new_idx = state.step_idx + offset
+    if 0 <= new_idx < len(traces):
+        state.step_idx, state.scroll_offset = new_idx, 0
+        return f"→ step {new_idx}"
+    return f"Invalid: {new_idx}"
+
+
+def _cmd_forward(state: ViewState, traces, arg: str) -> str | None:
+    """Relative jump forward (``+50``)."""
+    return _jump_relative(state, traces, int(arg)) if arg.isdigit() else None
+
+
+def _cmd_backward(state: ViewState, traces, arg: str) -> str | None:
+    """Relative jump backward (``-20``)."""
+    return _jump_relative(state, traces, -int(arg)) if arg.isdigit() else None
+
+
+def _cmd_search_forward(state: ViewState, traces, arg: str) -> str:
+    """Search forward for an instruction (``/add``, ``/ldi r16``)."""
+    search = arg.lower().strip()
+    if not search:
+        return "Empty search"
+    for i in range(state.step_idx + 1, len(traces)):
+        instr = traces[i].get("instr", "").lower()
+        if search in instr:
+            state.step_idx, state.scroll_offset = i, 0
+            return f"Found at step {i}: {traces[i].get('instr', '')}"
+    return f"Not found: {search}"
+
+
+def _cmd_search_backward(state: ViewState, traces, arg: str) -> str:
+    """Search backward for an instruction (``?add``, ``?ldi r16``)."""
+    search = arg.lower().strip()
+    if not search:
+        return "Empty search"
+    for i in range(state.step_idx - 1, -1, -1):
+        instr = traces[i].get("instr", "").lower()
+        if search in instr:
+            state.step_idx, state.scroll_offset = i, 0
+            return f"Found at step {i}: {traces[i].get('instr', '')}"
+    return f"Not found: {search}"
+
+
+def _cmd_jump_pc(state: ViewState, traces, arg: str) -> str:
+    """Jump to the first step at a PC address (``@100``, ``@0x64``)."""
+    try:
+        addr_str = arg.strip()
+        target_pc = _parse_int(addr_str)
+        for i in range(len(traces)):
+            if traces[i].get("pc", -1) == target_pc:
+                state.step_idx, state.scroll_offset = i, 0
+                return f"→ step {i} (PC=0x{target_pc:04X})"
+        return f"PC 0x{target_pc:04X} not found"
+    except ValueError:
+        return f"Invalid address: @{arg}"
+
+
+def _cmd_register(state: ViewState, traces, arg: str) -> str | None:
+    """Find a register change or value (``r10``, ``r16=42``)."""
+    if not arg:
+        return None
+    try:
+        parts = arg.split("=")
+        reg_num = int(parts[0])
+        if not (0 <= reg_num <= 31):
+            return f"Invalid register: R{reg_num}"
+
+        regs, reg_counts, _ = _trace_arrays(state, traces)
+        start = state.step_idx + 1
+        column = regs[start:, reg_num]
+        # Entries that did not record this register never match.
+        recorded = reg_counts[start:] > reg_num
+
+        if len(parts) == 1:
+            # Find next change to this register
+            current_val = regs[state.step_idx, reg_num]
+            hit = _first_match(recorded & (column != current_val))
+            if hit >= 0:
+                i = start + hit
+                state.step_idx, state.scroll_offset = i, 0
+                return f"R{reg_num} changed at step {i}: 0x{int(column[hit]):02X}"
+            return f"R{reg_num} doesn't change"
+        else:
+            # Find where register equals value
+            target_val = _parse_int(parts[1])
+            hit = _first_match(recorded & (column == target_val))
+            if hit >= 0:
+                i = start + hit
+                state.step_idx, state.scroll_offset = i, 0
+                return f"R{reg_num}=0x{target_val:02X} at step {i}"
+            return f"R{reg_num}=0x{target_val:02X} not found"
+    except (ValueError, IndexError):
+        return f"Invalid: r{arg}"
+
+
+def _cmd_memory(state: ViewState, traces, arg: str) -> str | None:
+    """Find a memory change or value (``m100``, ``m0x64=42``)."""
+    import numpy as np
+
+    if not arg:
+        return None
+    try:
+        parts = arg.split("=")
+        addr = _parse_int(parts[0])
+        steps, values = _address_history(_memory_table(state, traces), addr)
+
+        if len(parts) == 1:
+            # Find next change to this memory address
+            current_val = traces[state.step_idx].get("mem", {}).get(addr, 0)
+            later = np.searchsorted(steps, state.step_idx, side="right")
+            hit = _first_match(values[later:] != current_val)
+            if hit >= 0:
+                i, new_val = int(steps[later + hit]), int(values[later + hit])
+                state.step_idx, state.scroll_offset = i, 0
+                return f"Mem[0x{addr:04X}] changed at step {i}: 0x{new_val:02X}"
+            return f"Mem[0x{addr:04X}] doesn't change"
+        else:
+            # Find where memory equals value
+            target_val = _parse_int(parts[1])
+            start = state.step_idx + 1
+            # Index of the write in effect at ``start``, or -1 for zero.
+            k = int(np.searchsorted(steps, start, side="right")) - 1
+            if start < len(traces) and (values[k] if k >= 0 else 0) == target_val:
+                i = start
+            else:
+                hit = _first_match(values[k + 1 :] == target_val)
+                i = int(steps[k + 1 + hit]) if hit >= 0 else -1
+            if i >= 0:
+                state.step_idx, state.scroll_offset = i, 0
+                return f"Mem[0x{addr:04X}]=0x{target_val:02X} at step {i}"
+            return f"Mem[0x{addr:04X}]=0x{target_val:02X} not found"
+    except (ValueError, IndexError, OverflowError):
+        return f"Invalid: m{arg}"
+
+
+def _cmd_flag(state: ViewState, traces, arg: str) -> str | None:
+    """Find a flag change or value (``fZ``, ``fC=1``)."""
+    if not arg:
+        return None
+    flag_map = {"I": 7, "T": 6, "H": 5, "S": 4, "V": 3, "N": 2, "Z": 1, "C": 0}
+    try:
+        parts = arg.split("=")
+        flag_name = parts[0].upper()
+        if flag_name not in flag_map:
+            return f"Invalid flag: {flag_name}"
+
+        bit_pos = flag_map[flag_name]
+        sregs = _trace_arrays(state, traces)[2]
+        start = state.step_idx + 1
+        bits = (sregs[start:] >> bit_pos) & 1
+
+        if len(parts) == 1:
+            # Find next change to this flag
+            current_bit = (sregs[state.step_idx] >> bit_pos) & 1
+            hit = _first_match(bits != current_bit)
+            if hit >= 0:
+                i = start + hit
+                state.step_idx, state.scroll_offset = i, 0
+                return f"Flag {flag_name} changed at step {i}: {int(bits[hit])}"
+            return f"Flag {flag_name} doesn't change"
+        else:
+            # Find where flag equals value
+            target_val = int(parts[1])
+            if target_val not in [0, 1]:
+                return "Flag value must be 0 or 1"
+            hit = _first_match(bits == target_val)
+            if hit >= 0:
+                i = start + hit
+                state.step_idx, state.scroll_offset = i, 0
+                return f"Flag {flag_name}={target_val} at step {i}"
+            return f"Flag {flag_name}={target_val} not found"
+    except (ValueError, KeyError):
+        return f"Invalid: f{arg}"
+
+
+# Command handlers keyed by the command's first character. Each receives
+# the rest of the command and returns None if it does not apply.
+_COMMANDS: dict[str, Callable[[ViewState, Any, str], str | None]] = {
+    "+": _cmd_forward,
+    "-": _cmd_backward,
+    "/": _cmd_search_forward,
+    "?": _cmd_search_backward,
+    "@": _cmd_jump_pc,
+    "r": _cmd_register,
+    "m": _cmd_memory,
+    "f": _cmd_flag,
+}
+
+
 def run_command(state: ViewState, traces: list[dict]) -> str:
     """Execute a command and return status message.
 
@@ -575,164 +1483,20 @@ def run_command(state: ViewState, traces: list[dict]) -> str:
         - Help (h, help): Show command documentation
     """
     cmd = state.command_buffer.strip()
-    n = len(traces)
 
     # Jump to absolute step number
     if cmd.isdigit():
         t = int(cmd)
-        if 0 <= t < n:
+        if 0 <= t < len(traces):
             state.step_idx, state.scroll_offset = t, 0
             return f"→ step {t}"
         return f"Invalid: {t}"
 
-    # Relative jump (+50, -20)
-    if cmd and cmd[0] in "+-" and cmd[1:].isdigit():
-        new_idx = state.step_idx + int(cmd)
-        if 0 <= new_idx < n:
-            state.step_idx, state.scroll_offset = new_idx, 0
-            return f"→ step {new_idx}"
-        return f"Invalid: {new_idx}"
-
-    # Search forward for instruction (/add, /ldi r16)
-    if cmd.startswith("/"):
-        search = cmd[1:].lower().strip()
-        if not search:
-            return "Empty search"
-        for i in range(state.step_idx + 1, n):
-            instr = traces[i].get("instr", "").lower()
-            if search in instr:
-                state.step_idx, state.scroll_offset = i, 0
-                return f"Found at step {i}: {traces[i].get('instr', '')}"
-        return f"Not found: {search}"
-
-    # Search backward (?add, ?ldi r16)
-    if cmd.startswith("?"):
-        search = cmd[1:].lower().strip()
-        if not search:
-            return "Empty search"
-        for i in range(state.step_idx - 1, -1, -1):
-            instr = traces[i].get("instr", "").lower()
-            if search in instr:
-                state.step_idx, state.scroll_offset = i, 0
-                return f"Found at step {i}: {traces[i].get('instr', '')}"
-        return f"Not found: {search}"
-
-    # Jump to PC address (@100, @0x64)
-    if cmd.startswith("@"):
-        try:
-            addr_str = cmd[1:].strip()
-            target_pc = (
-                int(addr_str, 16) if addr_str.startswith("0x") else int(addr_str)
-            )
-            for i in range(n):
-                if traces[i].get("pc", -1) == target_pc:
-                    state.step_idx, state.scroll_offset = i, 0
-                    return f"→ step {i} (PC=0x{target_pc:04X})"
-            return f"PC 0x{target_pc:04X} not found"
-        except ValueError:
-            return f"Invalid address: {cmd}"
-
-    # Find register change (r10, r16=42)
-    if cmd.startswith("r") and len(cmd) >= 2:
-        try:
-            parts = cmd[1:].split("=")
-            reg_num = int(parts[0])
-            if not (0 <= reg_num <= 31):
-                return f"Invalid register: R{reg_num}"
-
-            if len(parts) == 1:
-                # Find next change to this register
-                current_val = (
-                    traces[state.step_idx].get("regs", [])[reg_num]
-                    if reg_num < len(traces[state.step_idx].get("regs", []))
-                    else 0
-                )
-                for i in range(state.step_idx + 1, n):
-                    regs = traces[i].get("regs", [])
-                    if reg_num < len(regs) and regs[reg_num] != current_val:
-                        state.step_idx, state.scroll_offset = i, 0
-                        return f"R{reg_num} changed at step {i}: 0x{regs[reg_num]:02X}"
-                return f"R{reg_num} doesn't change"
-            else:
-                # Find where register equals value
-                target_val = (
-                    int(parts[1], 16) if parts[1].startswith("0x") else int(parts[1])
-                )
-                for i in range(state.step_idx + 1, n):
-                    regs = traces[i].get("regs", [])
-                    if reg_num < len(regs) and regs[reg_num] == target_val:
-                        state.step_idx, state.scroll_offset = i, 0
-                        return f"R{reg_num}=0x{target_val:02X} at step {i}"
-                return f"R{reg_num}=0x{target_val:02X} not found"
-        except (ValueError, IndexError):
-            return f"Invalid: {cmd}"
-
-    # Memory search (m100, m0x64=42)
-    if cmd.startswith("m") and len(cmd) >= 2:
-        try:
-            parts = cmd[1:].split("=")
-            addr = int(parts[0], 16) if parts[0].startswith("0x") else int(parts[0])
-
-            if len(parts) == 1:
-                # Find next change to this memory address
-                current_val = traces[state.step_idx].get("mem", {}).get(addr, 0)
-                for i in range(state.step_idx + 1, n):
-                    mem = traces[i].get("mem", {})
-                    new_val = mem.get(addr, 0)
-                    if new_val != current_val:
-                        state.step_idx, state.scroll_offset = i, 0
-                        return f"Mem[0x{addr:04X}] changed at step {i}: 0x{new_val:02X}"
-                return f"Mem[0x{addr:04X}] doesn't change"
-            else:
-                # Find where memory equals value
-                target_val = (
-                    int(parts[1], 16) if parts[1].startswith("0x") else int(parts[1])
-                )
-                for i in range(state.step_idx + 1, n):
-                    mem = traces[i].get("mem", {})
-                    if mem.get(addr, 0) == target_val:
-                        state.step_idx, state.scroll_offset = i, 0
-                        return f"Mem[0x{addr:04X}]=0x{target_val:02X} at step {i}"
-                return f"Mem[0x{addr:04X}]=0x{target_val:02X} not found"
-        except (ValueError, IndexError):
-            return f"Invalid: {cmd}"
-
-    # Flag search (fZ, fC=1)
-    if cmd.startswith("f") and len(cmd) >= 2:
-        flag_map = {"I": 7, "T": 6, "H": 5, "S": 4, "V": 3, "N": 2, "Z": 1, "C": 0}
-        try:
-            parts = cmd[1:].split("=")
-            flag_name = parts[0].upper()
-            if flag_name not in flag_map:
-                return f"Invalid flag: {flag_name}"
-
-            bit_pos = flag_map[flag_name]
-
-            if len(parts) == 1:
-                # Find next change to this flag
-                current_sreg = traces[state.step_idx].get("sreg", 0)
-                current_bit = (current_sreg >> bit_pos) & 1
-                for i in range(state.step_idx + 1, n):
-                    sreg = traces[i].get("sreg", 0)
-                    bit = (sreg >> bit_pos) & 1
-                    if bit != current_bit:
-                        state.step_idx, state.scroll_offset = i, 0
-                        return f"Flag {flag_name} changed at step {i}: {bit}"
-                return f"Flag {flag_name} doesn't change"
-            else:
-                # Find where flag equals value
-                target_val = int(parts[1])
-                if target_val not in [0, 1]:
-                    return "Flag value must be 0 or 1"
-                for i in range(state.step_idx + 1, n):
-                    sreg = traces[i].get("sreg", 0)
-                    bit = (sreg >> bit_pos) & 1
-                    if bit == target_val:
-                        state.step_idx, state.scroll_offset = i, 0
-                        return f"Flag {flag_name}={target_val} at step {i}"
-                return f"Flag {flag_name}={target_val} not found"
-        except (ValueError, KeyError):
-            return f"Invalid: {cmd}"
+    handler = _COMMANDS.get(cmd[:1])
+    if handler is not None:
+        result = handler(state, traces, cmd[1:])
+        if result is not None:
+            return result
 
     # Help command
     if cmd in ["h", "help"]:
@@ -753,8 +1517,8 @@ def handle_play_pause(ctx: KeyContext) -> int:
     """Toggle play/pause."""
     ctx.state.playing = not ctx.state.playing
     if ctx.state.playing:
-        ctx.state.last_advance_time = time.time()
-    return ctx.redraw()
+        ctx.state.last_advance_time = time.monotonic()
+    return ctx.redraw_status()
 
 
 @key_handler(ord("l"), curses.KEY_RIGHT)
@@ -824,7 +1588,7 @@ def handle_slower(ctx: KeyContext) -> int:
     """Decrease playback speed."""
     ctx.state.delay = min(2.0, ctx.state.delay + 0.05)
     ctx.set_status(f"Speed: {ctx.state.delay:.2f}s")
-    return ctx.redraw()
+    return ctx.redraw_status()
 
 
 @key_handler(ord("]"))
@@ -832,21 +1596,21 @@ def handle_faster(ctx: KeyContext) -> int:
     """Increase playback speed."""
     ctx.state.delay = max(0.05, ctx.state.delay - 0.05)
     ctx.set_status(f"Speed: {ctx.state.delay:.2f}s")
-    return ctx.redraw()
+    return ctx.redraw_status()
 
 
 @key_handler(ord("="))
 def handle_show_info(ctx: KeyContext) -> int:
     """Show detailed step information."""
     show_info(ctx.scr, ctx.traces[ctx.state.step_idx], ctx.state.step_idx)
-    return ctx.redraw()
+    return ctx.redraw(full=True)
 
 
 @key_handler(ord("/"))
 def handle_show_help(ctx: KeyContext) -> int:
     """Show help screen."""
     show_help(ctx.scr)
-    return ctx.redraw()
+    return ctx.redraw(full=True)
 
 
 @key_handler(ord("j"))
@@ -863,6 +1627,141 @@ def handle_scroll_up(ctx: KeyContext, h: int) -> int:
     return ctx.redraw()
 
 
+@key_handler(ord(":"))
+def handle_command_mode(ctx: KeyContext) -> int:
+    """Enter command mode."""
+    state = ctx.state
+    state.command_mode, state.command_buffer, state.playing = True, "", False
+    return ctx.redraw_status()
+
+
+def _read_mark_name(ctx: KeyContext) -> str | None:
+    """Wait for the key naming a mark and return it, or None if not a-z.
+
+    The wait is bounded by _MARK_TIMEOUT_MS, so a stray ``m`` or ``'`` does
+    not hold up playback; a timeout is reported on the status line.
+    """
+    scr = ctx.scr
+    scr.timeout(_MARK_TIMEOUT_MS)
+    mc = scr.getch()
+    # Back to draining whatever else is queued without blocking.
+    scr.timeout(0)
+    if mc == -1:
+        ctx.set_status("Mark input timed out")
+        ctx.redraw_status()
+    return chr(mc) if 97 <= mc <= 122 else None
+
+
+@key_handler(ord("m"))
+def handle_set_mark(ctx: KeyContext) -> int:
+    """Set a mark at the current step."""
+    mn = _read_mark_name(ctx)
+    if mn is None:
+        return ctx.height
+    ctx.state.marks[mn] = ctx.state.step_idx
+    ctx.set_status(f"Mark '{mn}' set")
+    return ctx.redraw_status()
+
+
+@key_handler(ord("'"))
+def handle_goto_mark(ctx: KeyContext) -> int:
+    """Jump to a mark."""
+    mn = _read_mark_name(ctx)
+    if mn is None:
+        return ctx.height
+    state = ctx.state
+    if mn in state.marks:
+        state.step_idx, state.scroll_offset = state.marks[mn], 0
+        ctx.set_status(f"→ mark '{mn}'")
+    else:
+        ctx.set_status(f"Mark '{mn}' not set")
+    return ctx.redraw()
+
+
+def _command_mode_key(ctx: KeyContext, ch: int) -> None:
+    """Apply one key press to the command line being edited.
+
+    Args:
+        ctx: Key context of the running visualizer.
+        ch: Key code returned by ``getch()``.
+    """
+    state = ctx.state
+    if 32 <= ch <= 126:
+        # Only the command line changes; the rest of the frame is reused.
+        state.command_buffer += chr(ch)
+        ctx.redraw_status()
+    elif ch in _BACKSPACE_KEYS:
+        state.command_buffer = state.command_buffer[:-1]
+        ctx.redraw_status()
+    elif ch in _ENTER_KEYS:
+        state.status_msg = run_command(state, ctx.traces)
+        state.status_time = time.monotonic()
+        state.command_mode, state.command_buffer = False, ""
+        ctx.redraw()
+    elif ch == _K_ESC:
+        state.command_mode, state.command_buffer = False, ""
+        ctx.redraw_status()
+
+
+def _handle_key(ctx: KeyContext, ch: int) -> bool:
+    """Apply one key press to the view.
+
+    Handles terminal resizes and command-mode editing, and dispatches
+    every other key to its registered handler.
+
+    Args:
+        ctx: Key context of the running visualizer.
+        ch: Key code returned by ``getch()``.
+
+    Returns:
+        True if the visualizer should quit.
+    """
+    if ch == curses.KEY_RESIZE:
+        ctx.redraw(full=True)
+        return False
+
+    if ctx.state.command_mode:
+        _command_mode_key(ctx, ch)
+        return False
+
+    if 0 <= ch < _KEY_TABLE_SIZE:
+        handler = _key_table[ch]
+    else:
+        handler = _key_handlers.get(ch)
+    if handler:
+        # Scroll handlers also need the height of the memory view
+        if ch in _SCROLL_KEYS:
+            result = handler(ctx, ctx.height)
+        else:
+            result = handler(ctx)
+        return result is True  # Quit signal
+    return False
+
+
+def _input_timeout(state: ViewState) -> int:
+    """Return how long the next getch() may block, in milliseconds.
+
+    Input is awaited only until the next autoplay step is due or a shown
+    status message expires, whichever comes first, so the curses timeout
+    replaces a separate sleep between polls. With neither pending, getch()
+    blocks until a key arrives.
+
+    Args:
+        state: Current view state.
+
+    Returns:
+        Timeout suitable for ``scr.timeout()``.
+    """
+    deadlines = []
+    if state.playing:
+        deadlines.append(state.last_advance_time + state.delay)
+    if state.status_msg:
+        deadlines.append(state.status_time + _STATUS_DURATION)
+    if not deadlines:
+        return -1
+    return max(0, math.ceil((min(deadlines) - time.monotonic()) * 1000))
+
+
 def run_cli(
     cpu,
     mem_addr_start: int = 0,
@@ -883,17 +1782,22 @@ def run_cli(
         source_lines: Optional list of original assembly source lines for display.
 
     Raises:
-        RuntimeError: If cpu.step_trace is empty or missing.
+        RuntimeError: If cpu.step_trace is empty or missing, or if
+            source_lines are given for a program assembled without
+            ``keep_source=True``.
     """
     traces = getattr(cpu, "step_trace", None)
     if not traces:
         raise RuntimeError("cpu.step_trace empty")
+    if source_lines and not cpu.pc_to_line:
+        raise RuntimeError(
+            "source display needs a program assembled with keep_source=True"
+        )
 
     n = len(traces)
 
     def main(scr):
         curses.curs_set(0)
-        scr.nodelay(True)
 
         # Initialize color pairs for usability-focused design
         curses.start_color()
@@ -903,6 +1807,7 @@ def run_cli(
         )  # Black on green (highlights)
         curses.init_pair(2, curses.COLOR_GREEN, -1)  # Green text (active/positive)
         curses.init_pair(3, curses.COLOR_WHITE, -1)  # White text (important info)
+        _init_attrs()
 
         state = ViewState(delay=delay)
         ctx = KeyContext(
@@ -915,130 +1820,70 @@ def run_cli(
             source_lines=source_lines,
             n=n,
         )
-        h = ctx.redraw()
+        ctx.redraw()
 
+        ch = -1
         while True:
-            ch = scr.getch()
-
-            if ch == curses.KEY_RESIZE:
-                h = ctx.redraw()
-                continue
-
+            if ch == -1:
+                # Set every time: help and info switch to blocking reads.
+                scr.timeout(_input_timeout(state))
+                ch = scr.getch()
+
+            # Apply the keys already queued (e.g. a paste or the repeats of a
+            # held key), a due autoplay step and an expired status message
+            # before drawing, so each wakeup costs at most one frame. A key
+            # left over after _MAX_KEYS_PER_FRAME is handled after the frame.
+            ctx.deferred = True
             if ch != -1:
-                # Handle command mode
-                if state.command_mode:
-                    if ch == 27:
-                        state.command_mode, state.command_buffer = False, ""
-                        h = ctx.redraw()
-                    elif ch in (curses.KEY_ENTER, 10, 13):
-                        state.status_msg = run_command(state, traces)
-                        state.status_time = time.time()
-                        state.command_mode, state.command_buffer = False, ""
-                        h = ctx.redraw()
-                    elif ch in (curses.KEY_BACKSPACE, 127, 8):
-                        state.command_buffer = state.command_buffer[:-1]
-                        my, mx = scr.getmaxyx()
-                        safe_add(
-                            scr, my - 1, 0, f":{state.command_buffer}" + " " * 20, 0, mx
-                        )
-                        scr.refresh()
-                    elif 32 <= ch <= 126:
-                        state.command_buffer += chr(ch)
-                        my, mx = scr.getmaxyx()
-                        safe_add(scr, my - 1, 0, f":{state.command_buffer}", 0, mx)
-                        scr.refresh()
-                    continue
-
-                # Handle : for command mode
-                if ch == ord(":"):
-                    state.command_mode, state.command_buffer, state.playing = (
-                        True,
-                        "",
-                        False,
-                    )
-                    h = ctx.redraw()
-                    continue
-
-                # Handle marks (m and ')
-                if ch == ord("m"):
-                    scr.nodelay(False)
-                    mc = scr.getch()
-                    scr.nodelay(True)
-                    if 97 <= mc <= 122:
-                        mn = chr(mc)
-                        state.marks[mn] = state.step_idx
-                        ctx.set_status(f"Mark '{mn}' set")
-                        h = ctx.redraw()
-                    continue
-
-                if ch == ord("'"):
-                    scr.nodelay(False)
-                    mc = scr.getch()
-                    scr.nodelay(True)
-                    if 97 <= mc <= 122:
-                        mn = chr(mc)
-                        if mn in state.marks:
-                            state.step_idx, state.scroll_offset = state.marks[mn], 0
-                            ctx.set_status(f"→ mark '{mn}'")
-                        else:
-                            ctx.set_status(f"Mark '{mn}' not set")
-                        h = ctx.redraw()
-                    continue
-
-                # Dispatch to registered key handlers
-                handler = _key_handlers.get(ch)
-                if handler:
-                    # Handle scroll handlers that need h parameter
-                    if ch in (ord("j"), ord("k")):
-                        result = handler(ctx, h)
-                    else:
-                        result = handler(ctx)
-
-                    if result is True:  # Quit signal
+                scr.timeout(0)
+                for _ in range(_MAX_KEYS_PER_FRAME):
+                    if _handle_key(ctx, ch):
+                        return
+                    ch = scr.getch()
+                    if ch == -1:
                         break
-                    if isinstance(result, int):  # New height
-                        h = result
 
-            # Handle auto-play
-            if state.playing:
-                t = time.time()
-                if t - state.last_advance_time >= state.delay:
+            # Only autoplay and status expiry are timed; a paused view with
+            # no status message skips the clock entirely.
+            if state.playing or state.status_msg:
+                t = time.monotonic()
+                # Handle auto-play
+                if state.playing and t - state.last_advance_time >= state.delay:
                     if state.step_idx < n - 1:
                         state.step_idx += 1
-                        h = ctx.redraw()
-                        state.last_advance_time = t
+                        ctx.redraw()
+                        # Keep a fixed cadence so wakeup and drawing time do not
+                        # slow playback down; restart it after a longer stall
+                        # (e.g. the help screen) instead of catching up.
+                        state.last_advance_time += state.delay
+                        if t - state.last_advance_time >= state.delay:
+                            state.last_advance_time = t
                     else:
                         state.playing = False
-                time.sleep(0.01)
-            else:
-                # Check if status message expired and needs redraw
-                if state.status_msg:
-                    elapsed = time.time() - state.status_time
-                    if elapsed >= 0.5:
-                        state.status_msg = ""
-                        h = ctx.redraw()
-                time.sleep(0.05)
+                # Clear an expired status message, also during playback
+                if state.status_msg and t - state.status_time >= _STATUS_DURATION:
+                    state.status_msg = ""
+                    ctx.redraw_status()
+
+            ctx.deferred = False
+            ctx.flush()
 
     curses.wrapper(main)
 
 
-def main() -> None:
-    """Entry point for CLI command-line interface.
+def _int_auto(text: str) -> int:
+    """Parse an integer argument in decimal or with a 0x/0o/0b prefix."""
+    return int(text, 0)
 
-    Parses command-line arguments, assembles the input file, runs the CPU,
-    and launches either CLI or animation mode visualization.
 
-    The function supports two modes:
-    - CLI mode: Interactive terminal-based step-through debugger
-    - Animation mode: Generate video/GIF visualization of execution
+# Give argparse's "invalid ... value" message a readable type name.
+_int_auto.__name__ = "int"
 
-    Command-line arguments are organized into groups for better clarity:
-    - Execution options: Control CPU behavior (max-steps)
-    - Memory display: Configure memory address range (supports hex notation)
-    - CLI mode: Interactive playback settings
-    - Animation mode: Video generation parameters
-    """
-    from tiny8 import CPU, __version__, assemble_file
+
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser once; later calls reuse it."""
+    import argparse
 
     parser = argparse.ArgumentParser(
         prog="tiny8",
@@ -1105,7 +1950,7 @@ Interactive CLI Controls:
     mem_group.add_argument(
         "--mem-start",
         "-ms",
-        type=lambda x: int(x, 0),  # Support 0x hex notation
+        type=_int_auto,
         default=0x00,
         metavar="ADDR",
         help="starting memory address to display (decimal or 0xHEX, default: 0x00)",
@@ -1113,7 +1958,7 @@ Interactive CLI Controls:
     mem_group.add_argument(
         "--mem-end",
         "-me",
-        type=lambda x: int(x, 0),  # Support 0x hex notation
+        type=_int_auto,
         default=0xFF,
         metavar="ADDR",
         help="ending memory address to display (decimal or 0xHEX, default: 0xFF)",
@@ -1163,9 +2008,28 @@ Interactive CLI Controls:
         help="output filename for animation (e.g., output.mp4, output.gif)",
     )
 
-    args = parser.parse_args()
+    return parser
+
+
+def main() -> None:
+    """Entry point for CLI command-line interface.
+
+    Parses command-line arguments, assembles the input file, runs the CPU,
+    and launches either CLI or animation mode visualization.
+
+    The function supports two modes:
+    - CLI mode: Interactive terminal-based step-through debugger
+    - Animation mode: Generate video/GIF visualization of execution
+
+    Command-line arguments are organized into groups for better clarity:
+    - Execution options: Control CPU behavior (max-steps)
+    - Memory display: Configure memory address range (supports hex notation)
+    - CLI mode: Interactive playback settings
+    - Animation mode: Video generation parameters
+    """
+    args = _build_parser().parse_args()
 
-    asm = assemble_file(args.asm_file)
+    asm = assemble_file(args.asm_file, keep_source=args.mode == "cli")
     cpu = CPU()
     cpu.load_program(asm)
     cpu.run(max_steps=args.max_steps)
@@ -1173,7 +2037,7 @@ Interactive CLI Controls:
     if args.mode == "cli":
         run_cli(cpu, args.mem_start, args.mem_end, args.delay, asm.source_lines)
     elif args.mode == "ani":
-        from tiny8 import Visualizer
+        from .visualizer import Visualizer
 
         viz = Visualizer(cpu)
         viz.animate_execution(
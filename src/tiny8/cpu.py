@@ -6,12 +6,15 @@ The implementation favors readability over step-accurate emulation. Add
 instruction handlers by defining methods named ``op_<mnemonic>`` on ``CPU``.
 """
 
+import sys
+from operator import is_not
 from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
     from .assembler import AsmResult
 
 from .memory import Memory
+from .trace import StepTrace
 from .utils import ProgressBar
 
 # SREG flag bit positions and short descriptions.
@@ -24,6 +27,169 @@ SREG_N = 2  # Negative
 SREG_Z = 1  # Zero
 SREG_C = 0  # Carry
 
+# SREG bits rewritten by the arithmetic/logical flag helpers (all but I and
+# T), and by INC/DEC, which leave C and H alone.
+_ARITH_FLAGS = 0x3F
+_INCDEC_FLAGS = (1 << SREG_S) | (1 << SREG_V) | (1 << SREG_N) | (1 << SREG_Z)
+# SREG bits rewritten by MUL and by a successful DIV.
+_MUL_FLAGS = (1 << SREG_Z) | (1 << SREG_C) | (1 << SREG_H)
+_DIV_FLAGS = _MUL_FLAGS | (1 << SREG_V)
+
+# Mnemonic -> interned handler attribute name ("ADD" -> "op_add"), filled on
+# first use so step() does not lower-case and format the name every cycle.
+_OP_NAMES: dict[str, str] = {}
+
+# Jumps, calls and branches whose target _link() resolves ahead of time,
+# mapped to the handler that then runs them and its extra arguments. A
+# conditional branch is taken when ``sreg & mask == want``. An int operand is
+# an absolute address, except for RJMP/RCALL where it is a relative offset.
+_JUMP_OPS: dict[str, tuple[str, tuple[int, ...]]] = {
+    "JMP": ("_jmp_to", ()),
+    "RJMP": ("_jmp_to", ()),
+    "CALL": ("_call_to", ()),
+    "RCALL": ("_call_to", ()),
+    "BRNE": ("_branch_to", (1 << SREG_Z, 0)),
+    "BREQ": ("_branch_to", (1 << SREG_Z, 1 << SREG_Z)),
+    "BRCS": ("_branch_to", (1 << SREG_C, 1 << SREG_C)),
+    "BRCC": ("_branch_to", (1 << SREG_C, 0)),
+    "BRGE": ("_branch_to", (1 << SREG_S, 0)),
+    "BRLT": ("_branch_to", (1 << SREG_S, 1 << SREG_S)),
+    "BRMI": ("_branch_to", (1 << SREG_N, 1 << SREG_N)),
+    "BRPL": ("_branch_to", (1 << SREG_N, 0)),
+}
+
+# Times a PC must be reached as a block entry before compile()'s code
+# generation for that block pays off.
+_HOT_BLOCK_ENTRIES = 4
+
+# SREG bits INC, DEC and the logical ops produce for each 8-bit result (their
+# flags depend on nothing else), so compiled blocks can look them up.
+_INC_SREG = bytes(
+    ((r >> 7) << SREG_N)
+    | ((r == 0x80) << SREG_V)
+    | (((r >> 7) ^ (r == 0x80)) << SREG_S)
+    | ((r == 0) << SREG_Z)
+    for r in range(256)
+)
+_DEC_SREG = bytes(
+    ((r >> 7) << SREG_N)
+    | ((r == 0x7F) << SREG_V)
+    | (((r >> 7) ^ (r == 0x7F)) << SREG_S)
+    | ((r == 0) << SREG_Z)
+    for r in range(256)
+)
+_LOGIC_SREG = bytes(
+    ((r >> 7) << SREG_N) | ((r >> 7) << SREG_S) | ((r == 0) << SREG_Z)
+    for r in range(256)
+)
+
+# Source emitted by compile() in place of a call for the simplest handlers,
+# as (register update, SREG update, SREG bits written, number of register
+# operands); {0}, {1} are the int operands. Each mirrors its op_ handler,
+# write_reg and flag helper exactly.
+_WRITE_V = """
+if regs[{0}] != v:
+    regs[{0}] = v
+    rt((cpu.step_count, {0}, v))"""
+_INCDEC_STORE = f"cpu.sreg = cpu.sreg & {~_INCDEC_FLAGS} | {{}}[v]"
+_LOGIC_STORE = f"cpu.sreg = cpu.sreg & {~_ARITH_FLAGS} | logic_sreg[v]"
+_INLINE_OPS: dict[str, tuple[str, str, int, int]] = {
+    "op_ldi": ("v = {1} & 255" + _WRITE_V, "", 0, 1),
+    "op_mov": ("v = regs[{1}]" + _WRITE_V, "", 0, 2),
+    "op_inc": (
+        "v = (regs[{0}] + 1) & 255" + _WRITE_V,
+        _INCDEC_STORE.format("inc_sreg"),
+        _INCDEC_FLAGS,
+        1,
+    ),
+    "op_dec": (
+        "v = (regs[{0}] - 1) & 255" + _WRITE_V,
+        _INCDEC_STORE.format("dec_sreg"),
+        _INCDEC_FLAGS,
+        1,
+    ),
+    "op_and": ("v = regs[{0}] & regs[{1}]" + _WRITE_V, _LOGIC_STORE, _ARITH_FLAGS, 2),
+    "op_or": ("v = regs[{0}] | regs[{1}]" + _WRITE_V, _LOGIC_STORE, _ARITH_FLAGS, 2),
+    "op_eor": ("v = regs[{0}] ^ regs[{1}]" + _WRITE_V, _LOGIC_STORE, _ARITH_FLAGS, 2),
+}
+
+# Handlers that may skip the following instruction.
+_SKIP_OPS = frozenset(["op_cpse", "op_sbrs", "op_sbrc", "op_sbis", "op_sbic"])
+
+# Handlers that neither read nor change the PC, so compile() can run a
+# straight-line sequence of them without updating it in between. Any other
+# handler ends a compiled block.
+_STRAIGHT_OPS = frozenset(
+    [
+        "op_nop",
+        "op_ldi",
+        "op_mov",
+        "op_add",
+        "op_and",
+        "op_or",
+        "op_eor",
+        "op_sub",
+        "op_inc",
+        "op_dec",
+        "op_mul",
+        "op_adc",
+        "op_clr",
+        "op_ser",
+        "op_div",
+        "op_in",
+        "op_out",
+        "op_cpi",
+        "op_cp",
+        "op_lsl",
+        "op_lsr",
+        "op_rol",
+        "op_ror",
+        "op_com",
+        "op_neg",
+        "op_swap",
+        "op_tst",
+        "op_andi",
+        "op_ori",
+        "op_eori",
+        "op_subi",
+        "op_sbc",
+        "op_sbci",
+        "op_sei",
+        "op_cli",
+        "op_sbiw",
+        "op_adiw",
+        "op_sbi",
+        "op_cbi",
+        "op_ld",
+        "op_st",
+        "op_push",
+        "op_pop",
+    ]
+)
+
+
+def _is_reg(o) -> bool:
+    """Return True if ``o`` is a ``("reg", index)`` operand."""
+    return isinstance(o, tuple) and len(o) == 2 and o[0] == "reg"
+
+
+def _instr_text(instr: str, operands: tuple) -> str:
+    """Return the traced text of an instruction, e.g. ``"ADD R1, R2"``.
+
+    Args:
+        instr: Mnemonic.
+        operands: Operands as stored in the program.
+
+    Returns:
+        Upper-case mnemonic followed by the operands, with register operands
+        written as ``R<n>``.
+    """
+    try:
+        ops_text = ", ".join(f"R{o[1]}" if _is_reg(o) else str(o) for o in operands)
+    except Exception:
+        ops_text = ""
+    return f"{instr.upper()} {ops_text}".strip()
+
 
 class CPU:
     """In-memory 8-bit AVR-like CPU model.
@@ -33,7 +199,7 @@ class CPU:
     currently-loaded program.
 
     Attributes:
-        regs (list[int]): 32 8-bit general purpose registers (R0..R31).
+        regs (bytearray): 32 8-bit general purpose registers (R0..R31).
         pc (int): Program counter (index into ``program``).
         sp (int): Stack pointer (index into RAM in the associated
             :class:`tiny8.memory.Memory`).
@@ -44,8 +210,9 @@ class CPU:
             trace entries of the form ``(step, reg, new_value)``.
         mem_trace (list[tuple[int, int, int]]): Per-step memory change
             trace entries of the form ``(step, addr, new_value)``.
-        step_trace (list[dict]): Full per-step snapshots useful for
-            visualization and debugging.
+        step_trace (StepTrace): Per-step snapshots useful for visualization
+            and debugging. Behaves like a list of dicts; memory snapshots
+            are rebuilt on access from the RAM write log.
 
     Note:
         This implementation simplifies many AVR specifics (flag semantics,
@@ -55,7 +222,11 @@ class CPU:
 
     def __init__(self, memory: Optional[Memory] = None):
         self.mem = memory or Memory()
-        self.regs: list[int] = [0] * 32
+        # The RAM buffer and its write log are accessed directly by
+        # read_ram/write_ram instead of through the Memory methods.
+        self._ram = self.mem.ram
+        self._ram_changes = self.mem.ram_changes
+        self.regs = bytearray(32)
         self.pc: int = 0
         self.sp: int = self.mem.ram_size - 1
         self.sreg: int = 0
@@ -63,12 +234,24 @@ class CPU:
         self.interrupts: dict[int, bool] = {}
         self.reg_trace: list[tuple[int, int, int]] = []
         self.mem_trace: list[tuple[int, int, int]] = []
-        self.step_trace: list[dict] = []
+        self.step_trace = StepTrace(self.mem)
         self.program: list[tuple[str, tuple]] = []
         self.labels: dict[str, int] = {}
         self.pc_to_line: dict[int, int] = {}
         self.source_lines: list[str] = []
         self.running = False
+        # Handlers, decoded operands and trace text resolved per PC, and the
+        # program entries they were linked against.
+        self._threaded: list = []
+        self._linked_ops: list[tuple] = []
+        self._instr_texts: list[str] = []
+        self._linked_entries: tuple = ()
+        # Basic blocks set up by compile(), keyed by the PCs that start one:
+        # the (function, length) pair once generated, or the number of times
+        # the entry was reached before that. Set up again whenever the
+        # program is relinked.
+        self._blocks: dict[int, tuple] = {}
+        self._compiled_program: Optional[list] = None
 
     def set_flag(self, bit: int, value: bool) -> None:
         """Set or clear a specific SREG flag bit.
@@ -106,17 +289,20 @@ class CPU:
         r = result & 0xFF
         c = (result >> 8) & 1
         h = (((a & 0x0F) + (b & 0x0F) + carry_in) >> 4) & 1
-        n = (r >> 7) & 1
-        v = 1 if (((~(a ^ b) & 0xFF) & (a ^ r) & 0x80) != 0) else 0
+        n = r >> 7
+        v = ((~(a ^ b) & (a ^ r)) >> 7) & 1
         s = n ^ v
-        z = 1 if r == 0 else 0
-
-        self.set_flag(SREG_C, bool(c))
-        self.set_flag(SREG_H, bool(h))
-        self.set_flag(SREG_N, bool(n))
-        self.set_flag(SREG_V, bool(v))
-        self.set_flag(SREG_S, bool(s))
-        self.set_flag(SREG_Z, bool(z))
+        z = r == 0
+
+        # One SREG update instead of a set_flag() call per flag.
+        self.sreg = (self.sreg & ~_ARITH_FLAGS) | (
+            (c << SREG_C)
+            | (h << SREG_H)
+            | (n << SREG_N)
+            | (v << SREG_V)
+            | (s << SREG_S)
+            | (z << SREG_Z)
+        )
 
     def _set_flags_sub(self, a: int, b: int, borrow_in: int, result: int) -> None:
         """Set flags for SUB/CP/CPI (AVR semantics).
@@ -128,19 +314,23 @@ class CPU:
             result: Signed difference (a - b - borrow_in).
         """
         r = result & 0xFF
-        c = 1 if (a - b - borrow_in) < 0 else 0
-        h = 1 if ((a & 0x0F) - (b & 0x0F) - borrow_in) < 0 else 0
-        n = (r >> 7) & 1
-        v = 1 if ((((a ^ b) & (a ^ r)) & 0x80) != 0) else 0
+        # a negative difference has every bit from 8 (4 for the low
+        # nibble) upwards set, so the borrows are plain bit tests
+        c = (result >> 8) & 1
+        h = (((a & 0x0F) - (b & 0x0F) - borrow_in) >> 4) & 1
+        n = r >> 7
+        v = (((a ^ b) & (a ^ r)) >> 7) & 1
         s = n ^ v
-        z = 1 if r == 0 else 0
-
-        self.set_flag(SREG_C, bool(c))
-        self.set_flag(SREG_H, bool(h))
-        self.set_flag(SREG_N, bool(n))
-        self.set_flag(SREG_V, bool(v))
-        self.set_flag(SREG_S, bool(s))
-        self.set_flag(SREG_Z, bool(z))
+        z = r == 0
+
+        self.sreg = (self.sreg & ~_ARITH_FLAGS) | (
+            (c << SREG_C)
+            | (h << SREG_H)
+            | (n << SREG_N)
+            | (v << SREG_V)
+            | (s << SREG_S)
+            | (z << SREG_Z)
+        )
 
     def _set_flags_logical(self, result: int) -> None:
         """Set flags for logical operations (AND, OR, EOR) per AVR semantics.
@@ -156,12 +346,10 @@ class CPU:
         z = 1 if r == 0 else 0
         s = n  # v is 0, so s = n ^ 0 = n
 
-        self.set_flag(SREG_C, False)
-        self.set_flag(SREG_V, False)
-        self.set_flag(SREG_N, bool(n))
-        self.set_flag(SREG_S, bool(s))
-        self.set_flag(SREG_Z, bool(z))
-        self.set_flag(SREG_H, False)
+        # C, V and H are cleared with the rest of the mask.
+        self.sreg = (self.sreg & ~_ARITH_FLAGS) | (
+            (n << SREG_N) | (s << SREG_S) | (z << SREG_Z)
+        )
 
     def _set_flags_inc(self, old: int, new: int) -> None:
         """Set flags for INC (affects V, N, Z, S). Does not affect C or H.
@@ -174,10 +362,9 @@ class CPU:
         v = 1 if old == 0x7F else 0
         z = 1 if new == 0 else 0
         s = n ^ v
-        self.set_flag(SREG_N, bool(n))
-        self.set_flag(SREG_V, bool(v))
-        self.set_flag(SREG_S, bool(s))
-        self.set_flag(SREG_Z, bool(z))
+        self.sreg = (self.sreg & ~_INCDEC_FLAGS) | (
+            (n << SREG_N) | (v << SREG_V) | (s << SREG_S) | (z << SREG_Z)
+        )
 
     def _set_flags_add16(self, a: int, b: int, carry_in: int, result: int) -> None:
         """Set flags for 16-bit add (ADIW semantics approximation).
@@ -190,17 +377,19 @@ class CPU:
         """
         r = result & 0xFFFF
         c = (result >> 16) & 1
-        n = (r >> 15) & 1
-        v = 1 if (((~(a ^ b) & 0xFFFF) & (a ^ r) & 0x8000) != 0) else 0
+        n = r >> 15
+        v = ((~(a ^ b) & (a ^ r)) >> 15) & 1
         s = n ^ v
-        z = 1 if r == 0 else 0
-
-        self.set_flag(SREG_C, bool(c))
-        self.set_flag(SREG_N, bool(n))
-        self.set_flag(SREG_V, bool(v))
-        self.set_flag(SREG_S, bool(s))
-        self.set_flag(SREG_Z, bool(z))
-        self.set_flag(SREG_H, False)
+        z = r == 0
+
+        # H is cleared with the rest of the mask.
+        self.sreg = (self.sreg & ~_ARITH_FLAGS) | (
+            (c << SREG_C)
+            | (n << SREG_N)
+            | (v << SREG_V)
+            | (s << SREG_S)
+            | (z << SREG_Z)
+        )
 
     def _set_flags_sub16(self, a: int, b: int, borrow_in: int, result: int) -> None:
         """Set flags for 16-bit subtraction (SBIW semantics approximation).
@@ -212,18 +401,20 @@ class CPU:
             result: Integer difference a - b - borrow_in.
         """
         r = result & 0xFFFF
-        c = 1 if (a - b - borrow_in) < 0 else 0
-        n = (r >> 15) & 1
-        v = 1 if ((((a ^ b) & (a ^ r)) & 0x8000) != 0) else 0
+        c = (result >> 16) & 1
+        n = r >> 15
+        v = (((a ^ b) & (a ^ r)) >> 15) & 1
         s = n ^ v
-        z = 1 if r == 0 else 0
-
-        self.set_flag(SREG_C, bool(c))
-        self.set_flag(SREG_N, bool(n))
-        self.set_flag(SREG_V, bool(v))
-        self.set_flag(SREG_S, bool(s))
-        self.set_flag(SREG_Z, bool(z))
-        self.set_flag(SREG_H, False)
+        z = r == 0
+
+        # H is cleared with the rest of the mask.
+        self.sreg = (self.sreg & ~_ARITH_FLAGS) | (
+            (c << SREG_C)
+            | (n << SREG_N)
+            | (v << SREG_V)
+            | (s << SREG_S)
+            | (z << SREG_Z)
+        )
 
     def _set_flags_dec(self, old: int, new: int) -> None:
         """Set flags for DEC (affects V, N, Z, S). Does not affect C or H.
@@ -236,10 +427,9 @@ class CPU:
         v = 1 if old == 0x80 else 0
         z = 1 if new == 0 else 0
         s = n ^ v
-        self.set_flag(SREG_N, bool(n))
-        self.set_flag(SREG_V, bool(v))
-        self.set_flag(SREG_S, bool(s))
-        self.set_flag(SREG_Z, bool(z))
+        self.sreg = (self.sreg & ~_INCDEC_FLAGS) | (
+            (n << SREG_N) | (v << SREG_V) | (s << SREG_S) | (z << SREG_Z)
+        )
 
     # Register access
     def read_reg(self, r: int) -> int:
@@ -251,7 +441,7 @@ class CPU:
         Returns:
             The 8-bit value (0..255) stored in the register.
         """
-        return self.regs[r] & 0xFF
+        return self.regs[r]
 
     def write_reg(self, r: int, val: int) -> None:
         """Write an 8-bit value to register ``r`` and record the change.
@@ -278,8 +468,16 @@ class CPU:
 
         Returns:
             Byte value stored at ``addr`` (0..255).
+
+        Raises:
+            IndexError: If ``addr`` is outside RAM.
         """
-        return self.mem.read_ram(addr)
+        if addr < 0:
+            raise IndexError("RAM address out of range")
+        try:
+            return self._ram[addr]
+        except IndexError:
+            raise IndexError("RAM address out of range") from None
 
     def write_ram(self, addr: int, val: int) -> None:
         """Write an 8-bit value to RAM at ``addr`` and record the trace.
@@ -288,13 +486,24 @@ class CPU:
             addr: RAM address to write.
             val: Value to write; will be truncated to 8 bits.
 
+        Raises:
+            IndexError: If ``addr`` is outside RAM.
+
         Note:
-            The underlying :class:`Memory` object stores the value; a
-            ``(step, addr, val)`` tuple is appended to ``mem_trace`` for
-            visualizers/tests.
-        """
-        self.mem.write_ram(addr, val, self.step_count)
-        self.mem_trace.append((self.step_count, addr, val & 0xFF))
+            The value is stored in the :class:`Memory` RAM buffer and logged
+            to its ``ram_changes`` exactly as :meth:`Memory.write_ram` would,
+            without the extra method call; a ``(step, addr, val)`` tuple is
+            appended to ``mem_trace`` for visualizers/tests.
+        """
+        ram = self._ram
+        if addr < 0 or addr >= len(ram):
+            raise IndexError("RAM address out of range")
+        newv = val & 0xFF
+        old = ram[addr]
+        if old != newv:
+            ram[addr] = newv
+            self._ram_changes.append((addr, old, newv, self.step_count))
+        self.mem_trace.append((self.step_count, addr, newv))
 
     # Program loading
     def load_program(
@@ -323,7 +532,10 @@ class CPU:
         if hasattr(program, "program") and hasattr(program, "labels"):
             # It's an AsmResult
             asm = program
-            self.program = asm.program
+            # AsmResult listings are immutable (and may be shared through
+            # the assemble_file cache); copy so entries of the CPU's own
+            # program can be replaced in place, which relinks them.
+            self.program = list(asm.program)
             self.labels = asm.labels
             self.pc_to_line = asm.pc_to_line
             self.source_lines = asm.source_lines
@@ -335,6 +547,333 @@ class CPU:
             self.source_lines = source_lines or []
         self.pc = 0
 
+    def _link(self) -> list:
+        """Resolve handlers and label targets for the current program.
+
+        Returns:
+            A list parallel to ``program`` holding the bound ``op_`` handler
+            for each PC, or None where the mnemonic has no handler (the error
+            is raised only if that instruction is executed).
+
+        Note:
+            ``_linked_ops`` holds the handler arguments with register
+            operands decoded to their index. Jumps, calls and branches with a
+            known target are bound to ``_jmp_to``/``_call_to``/``_branch_to``
+            with the value the PC is set to, so taking them is a plain
+            assignment. This is only done while both their ``op_`` handler
+            and ``op_jmp`` (which the built-in ones delegate to) are the
+            built-in ones, so overrides keep being called. Unknown labels
+            are left to the ``op_`` handler and raise when executed.
+            ``_instr_texts`` holds the traced text of each instruction.
+            ``_linked_entries`` keeps the program entries the tables were
+            built from; :meth:`step` and :meth:`run` relink when ``program``
+            no longer holds those same entries, whether it was replaced,
+            resized or patched in place. If the program was compiled, its
+            block entries are worked out again as well.
+        """
+        threaded = []
+        linked_ops = []
+        instr_texts = []
+        labels = self.labels
+        stock_jmp = self._is_stock("op_jmp")
+        for pc, (instr, operands) in enumerate(self.program):
+            instr_texts.append(_instr_text(instr, operands))
+            name = _OP_NAMES.get(instr)
+            if name is None:
+                name = _OP_NAMES[instr] = sys.intern(f"op_{instr.lower()}")
+            jump = _JUMP_OPS.get(instr)
+            if (
+                jump is not None
+                and len(operands) == 1
+                and stock_jmp
+                and self._is_stock(name)
+            ):
+                target = operands[0]
+                if isinstance(target, str):
+                    target = labels[target] - 1 if target in labels else None
+                elif not isinstance(target, int):
+                    target = None
+                elif instr == "RJMP":
+                    target += pc
+                elif instr == "RCALL":
+                    target += pc - 1
+                else:
+                    target -= 1
+                if target is not None:
+                    name, extra = jump
+                    operands = (target, *extra)
+            threaded.append(getattr(self, name, None))
+            linked_ops.append(tuple(int(o[1]) if _is_reg(o) else o for o in operands))
+        self._threaded = threaded
+        self._linked_ops = linked_ops
+        self._instr_texts = instr_texts
+        self._linked_entries = tuple(self.program)
+        self._blocks = {}
+        if self._compiled_program is self.program:
+            leaders = {0}
+            for pc, handler in enumerate(threaded):
+                name = getattr(handler, "__name__", None)
+                if name in _STRAIGHT_OPS:
+                    continue
+                leaders.add(pc + 1)
+                if name in ("_jmp_to", "_call_to", "_branch_to"):
+                    leaders.add(linked_ops[pc][0] + 1)
+                elif name in _SKIP_OPS:
+                    leaders.add(pc + 2)
+            self._blocks = dict.fromkeys(leaders, 0)
+        return threaded
+
+    def _is_stock(self, name: str) -> bool:
+        """Return True if handler ``name`` is the one defined on CPU.
+
+        Args:
+            name: Handler attribute name, e.g. ``"op_jmp"``.
+
+        Returns:
+            False if a subclass or the instance overrides the handler, or if
+            it does not exist.
+        """
+        func = CPU.__dict__.get(name)
+        return (
+            func is not None
+            and getattr(getattr(self, name, None), "__func__", None) is func
+        )
+
+    def compile(self) -> None:
+        """Compile the loaded program for untraced runs.
+
+        After this, :meth:`run` with ``trace=False`` executes each basic
+        block (a straight-line run of instructions ending at a jump, branch,
+        skip, call or return) as a single generated Python function instead
+        of dispatching every instruction through the run loop. A block is
+        generated once its entry has been reached a few times; cold code
+        keeps running through the interpreter. Registers, RAM, SREG,
+        ``step_count`` and the ``reg_trace``/``mem_trace`` logs end up
+        exactly as with the interpreter, including when an instruction
+        raises. Traced runs and :meth:`step` are not affected.
+
+        Note:
+            Only the built-in ``op_`` handlers listed as straight-line are
+            grouped into blocks; overridden or custom handlers and
+            unimplemented instructions are executed one at a time. Entries
+            patched into the compiled program are picked up when it is
+            relinked; compile again after assigning a different ``program``.
+        """
+        self._compiled_program = self.program
+        self._link()
+
+    def _compile_block(self, start: int) -> tuple:
+        """Generate the function running the basic block entered at ``start``.
+
+        The function takes the number of steps it may execute (at least the
+        block length) and returns how many it executed. A block whose final
+        jump or branch leads back to ``start`` keeps looping inside the
+        function while the budget allows.
+
+        Args:
+            start: PC of the block's first instruction.
+
+        Returns:
+            A ``(function, length)`` pair, or ``(None, 1)`` if the
+            instruction at ``start`` has to be interpreted on its own.
+        """
+        threaded = self._threaded
+        linked_ops = self._linked_ops
+        n = len(threaded)
+        ns: dict = {
+            "cpu": self,
+            "inc_sreg": _INC_SREG,
+            "dec_sreg": _DEC_SREG,
+            "logic_sreg": _LOGIC_SREG,
+        }
+        # registers and the trace are re-read per call in case they were
+        # replaced since the block was generated
+        prologue = ["regs = cpu.regs", "rt = cpu.reg_trace.append"]
+        body: list[str] = []
+
+        def call(pc: int) -> str:
+            ns[f"h{pc}"] = threaded[pc]
+            args = []
+            for j, o in enumerate(linked_ops[pc]):
+                if type(o) is int:
+                    args.append(repr(o))
+                else:
+                    ns[f"k{pc}_{j}"] = o
+                    args.append(f"k{pc}_{j}")
+            return f"h{pc}({', '.join(args)})"
+
+        # straight-line part of the block: (pc, handler name, inline entry)
+        straight = []
+        pc = start
+        while pc < n:
+            handler = threaded[pc]
+            if handler is None:
+                break
+            name = handler.__name__
+            func = getattr(handler, "__func__", None)
+            if name not in _STRAIGHT_OPS or func is not CPU.__dict__.get(name):
+                break
+            ops = linked_ops[pc]
+            inline = _INLINE_OPS.get(name)
+            if inline is not None and not (
+                all(type(o) is int for o in ops)
+                and all(0 <= r < 32 for r in ops[: inline[3]])
+            ):
+                # inlined code must not raise, see below
+                inline = None
+            straight.append((pc, name, inline))
+            pc += 1
+
+        # An inlined SREG store is dead when later inlined ops in the block
+        # overwrite all of its bits before anything that may read SREG
+        # runs. Inlined code cannot raise, so the skipped value is never
+        # observable.
+        dead = set()
+        overwritten = 0
+        for spc, name, inline in reversed(straight):
+            if inline is None:
+                if name != "op_nop":
+                    overwritten = 0
+                continue
+            mask = inline[2]
+            if mask and not mask & ~overwritten:
+                dead.add(spc)
+            overwritten |= mask
+
+        for spc, name, inline in straight:
+            ops = linked_ops[spc]
+            if inline is not None:
+                body += inline[0].format(*ops).splitlines()
+                if inline[1] and spc not in dead:
+                    body.append(inline[1])
+            elif name != "op_nop":
+                body.append(call(spc))
+            body.append("cpu.step_count += 1")
+
+        handler = threaded[pc] if pc < n else None
+        name = getattr(handler, "__name__", None)
+        if name in ("_jmp_to", "_branch_to"):
+            size = pc + 1 - start
+            target = linked_ops[pc][0] + 1
+            body.append("cpu.step_count += 1")
+            if name == "_jmp_to":
+                taken = "True"
+            else:
+                taken = "cpu.sreg & {} == {}".format(*linked_ops[pc][1:])
+            if target == start:
+                # loop in place instead of returning to the run loop
+                lines = [*prologue, "done = 0", "while True:"]
+                lines += [f"    {line}" for line in body]
+                lines += [
+                    f"    done += {size}",
+                    f"    if not ({taken}):",
+                    f"        cpu.pc = {pc + 1}",
+                    "        return done",
+                    f"    if done + {size} > budget:",
+                    f"        cpu.pc = {start}",
+                    "        return done",
+                ]
+                return self._define_block(lines, ns), size
+            if name == "_jmp_to":
+                body.append(f"cpu.pc = {target}")
+            else:
+                body.append(f"cpu.pc = {target} if {taken} else {pc + 1}")
+        elif handler is not None and pc > start:
+            size = pc + 1 - start
+            body += [f"cpu.pc = {pc}", call(pc), "cpu.step_count += 1", "cpu.pc += 1"]
+        elif pc - start >= 2:
+            size = pc - start
+            body.append(f"cpu.pc = {pc}")
+        else:
+            return None, 1
+        return self._define_block([*prologue, *body, f"return {size}"], ns), size
+
+    @staticmethod
+    def _define_block(lines: list[str], ns: dict):
+        """Define a block function from its body lines and return it.
+
+        Names in ``ns`` are bound as default arguments so the body reads
+        them as fast locals rather than globals.
+        """
+        params = ", ".join(["budget", *(f"{k}={k}" for k in ns)])
+        src = "\n".join([f"def block({params}):", *(f"    {line}" for line in lines)])
+        exec(compile(src, "<tiny8 block>", "exec"), ns)  # noqa: S102
+        return ns["block"]
+
+    def _jmp_to(self, target: int) -> None:
+        """Set the PC for a jump whose target was resolved by :meth:`_link`."""
+        self.pc = target
+
+    def _push_return(self, ret: int) -> None:
+        """Push a 16-bit return address, high byte first.
+
+        Args:
+            ret: Address to push.
+
+        Note:
+            Equivalent to two :meth:`write_ram` calls with ``sp`` decremented
+            after each, but writes the RAM buffer directly when both bytes
+            fit.
+        """
+        sp = self.sp
+        hi = (ret >> 8) & 0xFF
+        lo = ret & 0xFF
+        if sp > 0:
+            ram = self._ram
+            try:
+                old_hi = ram[sp]
+            except IndexError:
+                pass
+            else:
+                step = self.step_count
+                old_lo = ram[sp - 1]
+                ram[sp] = hi
+                ram[sp - 1] = lo
+                if old_hi != hi:
+                    self._ram_changes.append((sp, old_hi, hi, step))
+                if old_lo != lo:
+                    self._ram_changes.append((sp - 1, old_lo, lo, step))
+                self.mem_trace += ((step, sp, hi), (step, sp - 1, lo))
+                self.sp = sp - 2
+                return
+        # out of range: let write_ram raise with the stack half-pushed
+        self.write_ram(sp, hi)
+        self.sp -= 1
+        self.write_ram(self.sp, lo)
+        self.sp -= 1
+
+    def _pop_return(self) -> int:
+        """Pop a 16-bit return address pushed by :meth:`_push_return`.
+
+        Returns:
+            The address, read low byte first.
+        """
+        sp = self.sp
+        if sp >= -1:
+            ram = self._ram
+            try:
+                ret = ram[sp + 1] | (ram[sp + 2] << 8)
+            except IndexError:
+                pass
+            else:
+                self.sp = sp + 2
+                return ret
+        self.sp += 1
+        low = self.read_ram(self.sp)
+        self.sp += 1
+        high = self.read_ram(self.sp)
+        return (high << 8) | low
+
+    def _call_to(self, target: int) -> None:
+        """Push the return address and jump to a target resolved by :meth:`_link`."""
+        self._push_return(self.pc + 1)
+        self.pc = target
+
+    def _branch_to(self, target: int, mask: int, want: int) -> None:
+        """Take a resolved branch when the SREG bits in ``mask`` equal ``want``."""
+        if self.sreg & mask == want:
+            self.pc = target
+
     # Instruction execution
     def step(self) -> bool:
         """Execute a single instruction at the current program counter.
@@ -354,67 +893,47 @@ class CPU:
             return False
 
         pre_exec_pc = self.pc
-        instr, operands = self.program[self.pc]
-
-        # Build textual form of the instruction for tracing (uppercase mnemonic
-        # and register names like R0..R31). Operands decoded for display only.
-        def fmt_op(o):
-            if isinstance(o, tuple) and len(o) == 2 and o[0] == "reg":
-                return f"R{o[1]}"
-            return str(o)
 
-        try:
-            ops_text = ", ".join(fmt_op(o) for o in operands)
-        except Exception:
-            ops_text = ""
-        instr_text = f"{instr.upper()} {ops_text}".strip()
-
-        # record pre-step snapshot
-        regs_snapshot = list(self.regs)
-        # memory snapshot: capture all non-zero RAM addresses (helps visualization of higher addresses)
-        mem_snapshot = {}
-        for i in range(0, self.mem.ram_size):
-            v = self.read_ram(i)
-            if v != 0:
-                mem_snapshot[i] = v
-
-        # Convert register operand markers back to raw ints for handlers, and
-        # call the appropriate handler (handlers are named op_<mnemonic> and
-        # expect plain ints/strings as originally implemented).
-        handler = getattr(self, f"op_{instr.lower()}", None)
+        # Handlers are named op_<mnemonic> and expect plain ints/strings; they,
+        # their decoded operands and the traced instruction text are worked
+        # out once per program by _link() rather than per step.
+        threaded = self._threaded
+        entries = self._linked_entries
+        if (
+            len(entries) != len(self.program)
+            or self.program[pre_exec_pc] is not entries[pre_exec_pc]
+        ):
+            threaded = self._link()
+        handler = threaded[pre_exec_pc]
         if handler is None:
+            instr = self.program[pre_exec_pc][0]
             raise NotImplementedError(f"Instruction {instr} not implemented")
 
-        # decode operands for handler call
-        decoded_ops = []
-        for o in operands:
-            if isinstance(o, tuple) and len(o) == 2 and o[0] == "reg":
-                decoded_ops.append(int(o[1]))
-            else:
-                decoded_ops.append(o)
+        # record pre-step snapshot; registers are copied into the trace's
+        # flat register buffer and memory is captured as a position in the
+        # RAM write log rather than by copying every non-zero byte
+        self.step_trace.begin(self.regs)
 
-        handler(*tuple(decoded_ops))
+        handler(*self._linked_ops[pre_exec_pc])
 
         # record step trace after execution (post-state)
         self.step_count += 1
 
         source_line = self.pc_to_line.get(pre_exec_pc, -1)
         self.step_trace.append(
-            {
-                "step": self.step_count,
-                "pc": pre_exec_pc,
-                "instr": instr_text,
-                "regs": regs_snapshot,
-                "mem": mem_snapshot,
-                "sreg": self.sreg,
-                "sp": self.sp,
-                "source_line": source_line,
-            }
+            step=self.step_count,
+            pc=pre_exec_pc,
+            instr=self._instr_texts[pre_exec_pc],
+            sreg=self.sreg,
+            sp=self.sp,
+            source_line=source_line,
         )
         self.pc += 1
         return True
 
-    def run(self, max_steps: int = 100000, show_progress: bool = True) -> None:
+    def run(
+        self, max_steps: int = 100000, show_progress: bool = True, trace: bool = True
+    ) -> None:
         """Run instructions until program end or ``max_steps`` is reached.
 
         Args:
@@ -422,10 +941,14 @@ class CPU:
                 (default 100000).
             show_progress: If True, display a progress bar during execution
                 (default True).
+            trace: If True (default), record a ``step_trace`` entry for every
+                step. If False, instructions are dispatched directly without
+                snapshots, which is much faster when only the final state is
+                needed; ``reg_trace`` and ``mem_trace`` are still recorded.
 
         Note:
-            This repeatedly calls :meth:`step` until it returns False or the
-            maximum step count is reached.
+            With tracing on this repeatedly calls :meth:`step` until it
+            returns False or the maximum step count is reached.
         """
         self.running = True
         steps = 0
@@ -434,6 +957,9 @@ class CPU:
             pb = ProgressBar(total=max_steps, desc="CPU execution")
 
         try:
+            if not trace:
+                self._run_untraced(max_steps, pb if show_progress else None)
+                return
             while self.running and steps < max_steps:
                 ok = self.step()
                 if not ok:
@@ -446,6 +972,61 @@ class CPU:
             if show_progress:
                 pb.close()
 
+    def _run_untraced(self, max_steps: int, pb: Optional[ProgressBar]) -> None:
+        """Execute up to ``max_steps`` instructions without step tracing.
+
+        Args:
+            max_steps: Maximum number of instruction steps to execute.
+            pb: Progress bar to advance once per step, or None.
+        """
+        program = self.program
+        entries = self._linked_entries
+        if len(entries) != len(program) or any(map(is_not, program, entries)):
+            self._link()
+        threaded = self._threaded
+        linked_ops = self._linked_ops
+        blocks = self._blocks if self._compiled_program is program else None
+        n = len(program)
+        steps = 0
+        while self.running and steps < max_steps:
+            pc = self.pc
+            if pc < 0 or pc >= n:
+                self.running = False
+                break
+            if blocks is not None:
+                block = blocks.get(pc, (None, 1))
+                if type(block) is int:
+                    # only blocks entered repeatedly are worth generating
+                    if block < _HOT_BLOCK_ENTRIES:
+                        blocks[pc] = block + 1
+                        block = (None, 1)
+                    else:
+                        block = blocks[pc] = self._compile_block(pc)
+                fn, size = block
+                if fn is not None and steps + size <= max_steps:
+                    start = self.step_count
+                    try:
+                        done = fn(max_steps - steps)
+                    except BaseException:
+                        # leave the PC on the instruction that raised
+                        self.pc = pc + (self.step_count - start) % size
+                        raise
+                    steps += done
+                    if pb is not None:
+                        pb.update(done)
+                    continue
+            handler = threaded[pc]
+            if handler is None:
+                raise NotImplementedError(
+                    f"Instruction {program[pc][0]} not implemented"
+                )
+            handler(*linked_ops[pc])
+            self.step_count += 1
+            self.pc += 1
+            steps += 1
+            if pb is not None:
+                pb.update(1)
+
     def op_nop(self):
         """No-operation: does nothing for one step."""
         pass
@@ -461,7 +1042,12 @@ class CPU:
             The AVR LDI instruction is normally restricted to R16..R31; this
             simplified implementation accepts any register index.
         """
-        self.write_reg(reg_idx, imm)
+        # inlined write_reg: only the immediate needs masking
+        v = imm & 0xFF
+        regs = self.regs
+        if regs[reg_idx] != v:
+            regs[reg_idx] = v
+            self.reg_trace.append((self.step_count, reg_idx, v))
 
     def op_mov(self, rd: int, rr: int):
         """Copy the value from register ``rr`` into ``rd``.
@@ -470,7 +1056,11 @@ class CPU:
             rd: Destination register index.
             rr: Source register index.
         """
-        self.write_reg(rd, self.read_reg(rr))
+        regs = self.regs
+        v = regs[rr]
+        if regs[rd] != v:
+            regs[rd] = v
+            self.reg_trace.append((self.step_count, rd, v))
 
     def op_add(self, rd: int, rr: int):
         """Add register ``rr`` to ``rd`` (Rd := Rd + Rr) and update flags.
@@ -482,10 +1072,14 @@ class CPU:
         Note:
             Sets C, H, N, V, S, Z per AVR semantics.
         """
-        a = self.read_reg(rd)
-        b = self.read_reg(rr)
+        regs = self.regs
+        a = regs[rd]
+        b = regs[rr]
         res = a + b
-        self.write_reg(rd, res & 0xFF)
+        nv = res & 0xFF
+        if nv != a:
+            regs[rd] = nv
+            self.reg_trace.append((self.step_count, rd, nv))
         self._set_flags_add(a, b, 0, res)
 
     def op_and(self, rd: int, rr: int):
@@ -495,9 +1089,12 @@ class CPU:
             rd: Destination register index.
             rr: Source register index.
         """
-        res = self.read_reg(rd) & self.read_reg(rr)
-        self.write_reg(rd, res)
-        self._set_flags_logical(res)
+        regs = self.regs
+        res = regs[rd] & regs[rr]
+        if regs[rd] != res:
+            regs[rd] = res
+            self.reg_trace.append((self.step_count, rd, res))
+        self.sreg = (self.sreg & ~_ARITH_FLAGS) | _LOGIC_SREG[res]
 
     def op_or(self, rd: int, rr: int):
         """Logical OR (Rd := Rd | Rr) — updates N, Z, V=0, C=0, H=0, S.
@@ -506,9 +1103,12 @@ class CPU:
             rd: Destination register index.
             rr: Source register index.
         """
-        res = self.read_reg(rd) | self.read_reg(rr)
-        self.write_reg(rd, res)
-        self._set_flags_logical(res)
+        regs = self.regs
+        res = regs[rd] | regs[rr]
+        if regs[rd] != res:
+            regs[rd] = res
+            self.reg_trace.append((self.step_count, rd, res))
+        self.sreg = (self.sreg & ~_ARITH_FLAGS) | _LOGIC_SREG[res]
 
     def op_eor(self, rd: int, rr: int):
         """Exclusive OR (Rd := Rd ^ Rr) — updates N, Z, V=0, C=0, H=0, S.
@@ -517,9 +1117,12 @@ class CPU:
             rd: Destination register index.
             rr: Source register index.
         """
-        res = self.read_reg(rd) ^ self.read_reg(rr)
-        self.write_reg(rd, res)
-        self._set_flags_logical(res)
+        regs = self.regs
+        res = regs[rd] ^ regs[rr]
+        if regs[rd] != res:
+            regs[rd] = res
+            self.reg_trace.append((self.step_count, rd, res))
+        self.sreg = (self.sreg & ~_ARITH_FLAGS) | _LOGIC_SREG[res]
 
     def op_sub(self, rd: int, rr: int):
         """Subtract (Rd := Rd - Rr) and set flags C,H,N,V,S,Z.
@@ -528,10 +1131,14 @@ class CPU:
             rd: Destination register index.
             rr: Source register index.
         """
-        a = self.read_reg(rd)
-        b = self.read_reg(rr)
+        regs = self.regs
+        a = regs[rd]
+        b = regs[rr]
         res_full = a - b
-        self.write_reg(rd, res_full & 0xFF)
+        nv = res_full & 0xFF
+        if nv != a:
+            regs[rd] = nv
+            self.reg_trace.append((self.step_count, rd, nv))
         self._set_flags_sub(a, b, 0, res_full)
 
     def op_inc(self, rd: int):
@@ -540,9 +1147,12 @@ class CPU:
         Args:
             rd: Destination register index.
         """
-        old = self.read_reg(rd)
+        regs = self.regs
+        old = regs[rd]
         new = (old + 1) & 0xFF
-        self.write_reg(rd, new)
+        # an 8-bit increment/decrement always changes the register
+        regs[rd] = new
+        self.reg_trace.append((self.step_count, rd, new))
         self._set_flags_inc(old, new)
 
     def op_dec(self, rd: int):
@@ -551,9 +1161,12 @@ class CPU:
         Args:
             rd: Destination register index.
         """
-        old = self.read_reg(rd)
+        regs = self.regs
+        old = regs[rd]
         new = (old - 1) & 0xFF
-        self.write_reg(rd, new)
+        # an 8-bit increment/decrement always changes the register
+        regs[rd] = new
+        self.reg_trace.append((self.step_count, rd, new))
         self._set_flags_dec(old, new)
 
     def op_mul(self, rd: int, rr: int):
@@ -566,17 +1179,21 @@ class CPU:
         Note:
             Updates Z and C flags. Z set if product == 0; C set if high != 0.
         """
-        a = self.read_reg(rd)
-        b = self.read_reg(rr)
+        regs = self.regs
+        a = regs[rd]
+        b = regs[rr]
         prod = a * b
         low = prod & 0xFF
-        high = (prod >> 8) & 0xFF
-        self.write_reg(rd, low)
-        if rd + 1 < 32:
-            self.write_reg(rd + 1, high)
-        self.set_flag(SREG_Z, prod == 0)
-        self.set_flag(SREG_C, high != 0)
-        self.set_flag(SREG_H, False)
+        high = prod >> 8  # at most 0xFE for two bytes
+        if low != a:
+            regs[rd] = low
+            self.reg_trace.append((self.step_count, rd, low))
+        if rd + 1 < 32 and regs[rd + 1] != high:
+            regs[rd + 1] = high
+            self.reg_trace.append((self.step_count, rd + 1, high))
+        self.sreg = (self.sreg & ~_MUL_FLAGS) | (
+            ((prod == 0) << SREG_Z) | ((high != 0) << SREG_C)
+        )
 
     def op_adc(self, rd: int, rr: int):
         """Add with carry (Rd := Rd + Rr + C) and update flags.
@@ -585,11 +1202,15 @@ class CPU:
             rd: Destination register index.
             rr: Source register index.
         """
-        a = self.read_reg(rd)
-        b = self.read_reg(rr)
-        carry_in = 1 if self.get_flag(SREG_C) else 0
+        regs = self.regs
+        a = regs[rd]
+        b = regs[rr]
+        carry_in = (self.sreg >> SREG_C) & 1
         res = a + b + carry_in
-        self.write_reg(rd, res & 0xFF)
+        nv = res & 0xFF
+        if nv != a:
+            regs[rd] = nv
+            self.reg_trace.append((self.step_count, rd, nv))
         self._set_flags_add(a, b, carry_in, res)
 
     def op_clr(self, rd: int):
@@ -599,12 +1220,7 @@ class CPU:
             rd: Destination register index.
         """
         self.write_reg(rd, 0)
-        self.set_flag(SREG_N, False)
-        self.set_flag(SREG_V, False)
-        self.set_flag(SREG_S, False)
-        self.set_flag(SREG_Z, True)
-        self.set_flag(SREG_C, False)
-        self.set_flag(SREG_H, False)
+        self.sreg = (self.sreg & ~_ARITH_FLAGS) | (1 << SREG_Z)
 
     def op_ser(self, rd: int):
         """Set register all ones (Rd := 0xFF). Update flags conservatively.
@@ -613,12 +1229,7 @@ class CPU:
             rd: Destination register index.
         """
         self.write_reg(rd, 0xFF)
-        self.set_flag(SREG_N, True)
-        self.set_flag(SREG_V, False)
-        self.set_flag(SREG_S, True)
-        self.set_flag(SREG_Z, False)
-        self.set_flag(SREG_C, False)
-        self.set_flag(SREG_H, False)
+        self.sreg = (self.sreg & ~_ARITH_FLAGS) | (1 << SREG_N) | (1 << SREG_S)
 
     def op_div(self, rd: int, rr: int):
         """Unsigned divide convenience instruction: quotient -> Rd, remainder -> Rd+1.
@@ -630,22 +1241,18 @@ class CPU:
         Note:
             If divisor is zero, sets C and Z flags to indicate error.
         """
-        a = self.read_reg(rd)
-        b = self.read_reg(rr)
+        a = self.regs[rd]
+        b = self.regs[rr]
         if b == 0:
             self.write_reg(rd, 0)
-            self.set_flag(SREG_C, True)
-            self.set_flag(SREG_Z, True)
+            self.sreg |= (1 << SREG_C) | (1 << SREG_Z)
             return
         q = a // b
         r = a % b
         self.write_reg(rd, q)
         if rd + 1 < 32:
             self.write_reg(rd + 1, r)
-        self.set_flag(SREG_Z, q == 0)
-        self.set_flag(SREG_C, False)
-        self.set_flag(SREG_H, False)
-        self.set_flag(SREG_V, False)
+        self.sreg = (self.sreg & ~_DIV_FLAGS) | ((q == 0) << SREG_Z)
 
     def op_in(self, rd: int, port: int):
         """Read from I/O port into register.
@@ -664,7 +1271,7 @@ class CPU:
             port: Port address to write to.
             rr: Source register index.
         """
-        val = self.read_reg(rr)
+        val = self.regs[rr]
         self.write_ram(port, val)
 
     def op_jmp(self, label: str | int):
@@ -693,7 +1300,7 @@ class CPU:
             rd: Register index to compare.
             imm: Immediate value to compare against.
         """
-        a = self.read_reg(rd)
+        a = self.regs[rd]
         b = imm & 0xFF
         res = a - b
         self._set_flags_sub(a, b, 0, res)
@@ -705,8 +1312,8 @@ class CPU:
             rd: First register index.
             rr: Second register index.
         """
-        a = self.read_reg(rd)
-        b = self.read_reg(rr)
+        a = self.regs[rd]
+        b = self.regs[rr]
         res = a - b
         self._set_flags_sub(a, b, 0, res)
 
@@ -716,18 +1323,22 @@ class CPU:
         Args:
             rd: Destination register index.
         """
-        v = self.read_reg(rd)
-        carry = (v >> 7) & 1
+        regs = self.regs
+        v = regs[rd]
+        carry = v >> 7
         nv = (v << 1) & 0xFF
-        self.write_reg(rd, nv)
-        self.set_flag(SREG_C, bool(carry))
-        n = (nv >> 7) & 1
+        if nv != v:
+            regs[rd] = nv
+            self.reg_trace.append((self.step_count, rd, nv))
+        n = nv >> 7
         vflag = n ^ carry
-        self.set_flag(SREG_N, bool(n))
-        self.set_flag(SREG_V, bool(vflag))
-        self.set_flag(SREG_S, bool(n ^ vflag))
-        self.set_flag(SREG_Z, nv == 0)
-        self.set_flag(SREG_H, False)
+        self.sreg = (self.sreg & ~_ARITH_FLAGS) | (
+            (carry << SREG_C)
+            | (n << SREG_N)
+            | (vflag << SREG_V)
+            | ((n ^ vflag) << SREG_S)
+            | ((nv == 0) << SREG_Z)
+        )
 
     def op_lsr(self, rd: int):
         """Logical shift right (Rd := Rd >> 1).
@@ -735,16 +1346,19 @@ class CPU:
         Args:
             rd: Destination register index.
         """
-        v = self.read_reg(rd)
+        regs = self.regs
+        v = regs[rd]
         carry = v & 1
-        nv = (v >> 1) & 0xFF
-        self.write_reg(rd, nv)
-        self.set_flag(SREG_C, bool(carry))
-        self.set_flag(SREG_N, False)
-        self.set_flag(SREG_V, bool(carry))
-        self.set_flag(SREG_S, bool(carry))
-        self.set_flag(SREG_Z, nv == 0)
-        self.set_flag(SREG_H, False)
+        nv = v >> 1
+        if nv != v:
+            regs[rd] = nv
+            self.reg_trace.append((self.step_count, rd, nv))
+        self.sreg = (self.sreg & ~_ARITH_FLAGS) | (
+            (carry << SREG_C)
+            | (carry << SREG_V)
+            | (carry << SREG_S)
+            | ((nv == 0) << SREG_Z)
+        )
 
     def op_rol(self, rd: int):
         """Rotate left through carry.
@@ -752,17 +1366,18 @@ class CPU:
         Args:
             rd: Destination register index.
         """
-        v = self.read_reg(rd)
-        carry_in = 1 if self.get_flag(SREG_C) else 0
-        carry_out = (v >> 7) & 1
+        v = self.regs[rd]
+        carry_in = (self.sreg >> SREG_C) & 1
+        carry_out = v >> 7
         nv = ((v << 1) & 0xFF) | carry_in
         self.write_reg(rd, nv)
-        self.set_flag(SREG_C, bool(carry_out))
-        self.set_flag(SREG_N, bool((nv >> 7) & 1))
-        self.set_flag(SREG_Z, nv == 0)
-        self.set_flag(SREG_V, False)
-        self.set_flag(SREG_S, bool((nv >> 7) & 1))
-        self.set_flag(SREG_H, False)
+        n = nv >> 7
+        self.sreg = (self.sreg & ~_ARITH_FLAGS) | (
+            (carry_out << SREG_C)
+            | (n << SREG_N)
+            | (n << SREG_S)
+            | ((nv == 0) << SREG_Z)
+        )
 
     def op_ror(self, rd: int):
         """Rotate right through carry.
@@ -770,17 +1385,18 @@ class CPU:
         Args:
             rd: Destination register index.
         """
-        v = self.read_reg(rd)
-        carry_in = 1 if self.get_flag(SREG_C) else 0
+        v = self.regs[rd]
+        carry_in = (self.sreg >> SREG_C) & 1
         carry_out = v & 1
         nv = (v >> 1) | (carry_in << 7)
         self.write_reg(rd, nv)
-        self.set_flag(SREG_C, bool(carry_out))
-        self.set_flag(SREG_N, bool((nv >> 7) & 1))
-        self.set_flag(SREG_Z, nv == 0)
-        self.set_flag(SREG_V, False)
-        self.set_flag(SREG_S, bool((nv >> 7) & 1))
-        self.set_flag(SREG_H, False)
+        # the carry rotated into bit 7 is the new sign
+        self.sreg = (self.sreg & ~_ARITH_FLAGS) | (
+            (carry_out << SREG_C)
+            | (carry_in << SREG_N)
+            | (carry_in << SREG_S)
+            | ((nv == 0) << SREG_Z)
+        )
 
     def op_com(self, rd: int):
         """One's complement: Rd := ~Rd. Updates N,V,S,Z,C per AVR-ish semantics.
@@ -788,16 +1404,13 @@ class CPU:
         Args:
             rd: Destination register index.
         """
-        v = self.read_reg(rd)
+        v = self.regs[rd]
         nv = (~v) & 0xFF
         self.write_reg(rd, nv)
         n = (nv >> 7) & 1
-        self.set_flag(SREG_N, bool(n))
-        self.set_flag(SREG_V, False)
-        self.set_flag(SREG_S, bool(n))
-        self.set_flag(SREG_Z, nv == 0)
-        self.set_flag(SREG_C, True)
-        self.set_flag(SREG_H, False)
+        self.sreg = (self.sreg & ~_ARITH_FLAGS) | (
+            (n << SREG_N) | (n << SREG_S) | ((nv == 0) << SREG_Z) | (1 << SREG_C)
+        )
 
     def op_neg(self, rd: int):
         """Two's complement (negate): Rd := 0 - Rd. Flags as subtraction from 0.
@@ -805,7 +1418,7 @@ class CPU:
         Args:
             rd: Destination register index.
         """
-        a = self.read_reg(rd)
+        a = self.regs[rd]
         res_full = 0 - a
         self.write_reg(rd, res_full & 0xFF)
         self._set_flags_sub(0, a, 0, res_full)
@@ -816,7 +1429,7 @@ class CPU:
         Args:
             rd: Destination register index.
         """
-        v = self.read_reg(rd)
+        v = self.regs[rd]
         nv = ((v & 0x0F) << 4) | ((v >> 4) & 0x0F)
         self.write_reg(rd, nv)
 
@@ -826,7 +1439,7 @@ class CPU:
         Args:
             rd: Register index to test.
         """
-        v = self.read_reg(rd)
+        v = self.regs[rd]
         res = v & v
         self._set_flags_logical(res)
 
@@ -837,7 +1450,7 @@ class CPU:
             rd: Destination register index.
             imm: Immediate value.
         """
-        res = self.read_reg(rd) & (imm & 0xFF)
+        res = self.regs[rd] & (imm & 0xFF)
         self.write_reg(rd, res)
         self._set_flags_logical(res)
 
@@ -848,7 +1461,7 @@ class CPU:
             rd: Destination register index.
             imm: Immediate value.
         """
-        res = self.read_reg(rd) | (imm & 0xFF)
+        res = self.regs[rd] | (imm & 0xFF)
         self.write_reg(rd, res)
         self._set_flags_logical(res)
 
@@ -859,7 +1472,7 @@ class CPU:
             rd: Destination register index.
             imm: Immediate value.
         """
-        res = self.read_reg(rd) ^ (imm & 0xFF)
+        res = self.regs[rd] ^ (imm & 0xFF)
         self.write_reg(rd, res)
         self._set_flags_logical(res)
 
@@ -870,7 +1483,7 @@ class CPU:
             rd: Destination register index.
             imm: Immediate value.
         """
-        a = self.read_reg(rd)
+        a = self.regs[rd]
         b = imm & 0xFF
         res_full = a - b
         self.write_reg(rd, res_full & 0xFF)
@@ -883,11 +1496,15 @@ class CPU:
             rd: Destination register index.
             rr: Source register index.
         """
-        a = self.read_reg(rd)
-        b = self.read_reg(rr)
-        borrow_in = 1 if self.get_flag(SREG_C) else 0
+        regs = self.regs
+        a = regs[rd]
+        b = regs[rr]
+        borrow_in = (self.sreg >> SREG_C) & 1
         res_full = a - b - borrow_in
-        self.write_reg(rd, res_full & 0xFF)
+        nv = res_full & 0xFF
+        if nv != a:
+            regs[rd] = nv
+            self.reg_trace.append((self.step_count, rd, nv))
         self._set_flags_sub(a, b, borrow_in, res_full)
 
     def op_sbci(self, rd: int, imm: int):
@@ -897,9 +1514,9 @@ class CPU:
             rd: Destination register index.
             imm: Immediate value.
         """
-        a = self.read_reg(rd)
+        a = self.regs[rd]
         b = imm & 0xFF
-        borrow_in = 1 if self.get_flag(SREG_C) else 0
+        borrow_in = (self.sreg >> SREG_C) & 1
         res_full = a - b - borrow_in
         self.write_reg(rd, res_full & 0xFF)
         self._set_flags_sub(a, b, borrow_in, res_full)
@@ -919,8 +1536,8 @@ class CPU:
             rd: First register index.
             rr: Second register index.
         """
-        a = self.read_reg(rd)
-        b = self.read_reg(rr)
+        a = self.regs[rd]
+        b = self.regs[rr]
         self._set_flags_sub(a, b, 0, a - b)
         if a == b:
             self.pc += 1
@@ -932,7 +1549,7 @@ class CPU:
             rd: Register index.
             bit: Bit position to test.
         """
-        v = self.read_reg(rd)
+        v = self.regs[rd]
         if ((v >> (bit & 7)) & 1) == 1:
             self.pc += 1
 
@@ -943,7 +1560,7 @@ class CPU:
             rd: Register index.
             bit: Bit position to test.
         """
-        v = self.read_reg(rd)
+        v = self.regs[rd]
         if ((v >> (bit & 7)) & 1) == 0:
             self.pc += 1
 
@@ -976,8 +1593,8 @@ class CPU:
             rd_word_low: Low register of the pair (even register index).
             imm_word: 16-bit immediate to subtract.
         """
-        lo = self.read_reg(rd_word_low)
-        hi = self.read_reg(rd_word_low + 1) if (rd_word_low + 1) < 32 else 0
+        lo = self.regs[rd_word_low]
+        hi = self.regs[rd_word_low + 1] if (rd_word_low + 1) < 32 else 0
         word = (hi << 8) | lo
         new = (word - (imm_word & 0xFFFF)) & 0xFFFF
         new_lo = new & 0xFF
@@ -994,8 +1611,8 @@ class CPU:
             rd_word_low: Low register of the pair (even register index).
             imm_word: 16-bit immediate to add.
         """
-        lo = self.read_reg(rd_word_low)
-        hi = self.read_reg(rd_word_low + 1) if (rd_word_low + 1) < 32 else 0
+        lo = self.regs[rd_word_low]
+        hi = self.regs[rd_word_low + 1] if (rd_word_low + 1) < 32 else 0
         word = (hi << 8) | lo
         new = (word + (imm_word & 0xFFFF)) & 0xFFFF
         new_lo = new & 0xFF
@@ -1022,11 +1639,7 @@ class CPU:
         Args:
             label: Call target (label name or relative offset).
         """
-        ret = self.pc + 1
-        self.write_ram(self.sp, (ret >> 8) & 0xFF)
-        self.sp -= 1
-        self.write_ram(self.sp, ret & 0xFF)
-        self.sp -= 1
+        self._push_return(self.pc + 1)
         if isinstance(label, int):
             target = self.pc + int(label)
             self.pc = int(target) - 1
@@ -1064,7 +1677,7 @@ class CPU:
             rd: Destination register index.
             addr_reg: Register index containing the RAM address to load from.
         """
-        addr = self.read_reg(addr_reg)
+        addr = self.regs[addr_reg]
         val = self.read_ram(addr)
         self.write_reg(rd, val)
 
@@ -1076,8 +1689,8 @@ class CPU:
             addr_reg: Register index containing the RAM address to write to.
             rr: Source register index to store.
         """
-        addr = self.read_reg(addr_reg)
-        val = self.read_reg(rr)
+        addr = self.regs[addr_reg]
+        val = self.regs[rr]
         self.write_ram(addr, val)
 
     def op_brne(self, label: str):
@@ -1086,8 +1699,7 @@ class CPU:
         Args:
             label: Destination label to jump to if Z flag is not set.
         """
-        z = self.get_flag(SREG_Z)
-        if not z:
+        if not (self.sreg >> SREG_Z) & 1:
             self.op_jmp(label)
 
     def op_breq(self, label: str):
@@ -1096,8 +1708,7 @@ class CPU:
         Args:
             label: Destination label to jump to if Z flag is set.
         """
-        z = self.get_flag(SREG_Z)
-        if z:
+        if (self.sreg >> SREG_Z) & 1:
             self.op_jmp(label)
 
     def op_brcs(self, label: str):
@@ -1106,8 +1717,7 @@ class CPU:
         Args:
             label (str): Destination label to jump to if the carry flag is set.
         """
-        c = self.get_flag(SREG_C)
-        if c:
+        if (self.sreg >> SREG_C) & 1:
             self.op_jmp(label)
 
     def op_brcc(self, label: str):
@@ -1116,8 +1726,7 @@ class CPU:
         Args:
             label (str): Destination label to jump to if the carry flag is clear.
         """
-        c = self.get_flag(SREG_C)
-        if not c:
+        if not (self.sreg >> SREG_C) & 1:
             self.op_jmp(label)
 
     def op_brge(self, label: str | int):
@@ -1126,8 +1735,7 @@ class CPU:
         Args:
             label: Destination label or address to jump to if the condition is met.
         """
-        s = self.get_flag(SREG_S)
-        if not s:
+        if not (self.sreg >> SREG_S) & 1:
             self.op_jmp(label)
 
     def op_brlt(self, label: str | int):
@@ -1136,8 +1744,7 @@ class CPU:
         Args:
             label: Destination label or address to jump to if the condition is met.
         """
-        s = self.get_flag(SREG_S)
-        if s:
+        if (self.sreg >> SREG_S) & 1:
             self.op_jmp(label)
 
     def op_brmi(self, label: str | int):
@@ -1146,8 +1753,7 @@ class CPU:
         Args:
             label: Destination label or address to jump to if the condition is met.
         """
-        n = self.get_flag(SREG_N)
-        if n:
+        if (self.sreg >> SREG_N) & 1:
             self.op_jmp(label)
 
     def op_brpl(self, label: str | int):
@@ -1156,8 +1762,7 @@ class CPU:
         Args:
             label: Destination label or address to jump to if the condition is met.
         """
-        n = self.get_flag(SREG_N)
-        if not n:
+        if not (self.sreg >> SREG_N) & 1:
             self.op_jmp(label)
 
     def op_push(self, rr: int):
@@ -1170,7 +1775,7 @@ class CPU:
             The value of register ``rr`` is written to RAM at the current
             stack pointer, and the stack pointer is then decremented.
         """
-        val = self.read_reg(rr)
+        val = self.regs[rr]
         self.write_ram(self.sp, val)
         self.sp -= 1
 
@@ -1198,11 +1803,7 @@ class CPU:
             The return address (pc+1) is pushed as two bytes (high then low) onto
             the stack, decrementing the stack pointer after each write.
         """
-        ret = self.pc + 1
-        self.write_ram(self.sp, (ret >> 8) & 0xFF)
-        self.sp -= 1
-        self.write_ram(self.sp, ret & 0xFF)
-        self.sp -= 1
+        self._push_return(self.pc + 1)
         self.op_jmp(label)
 
     def op_ret(self):
@@ -1212,20 +1813,12 @@ class CPU:
             Two bytes are popped from the stack (low then high) to reconstruct the
             return address, which is then loaded into the program counter.
         """
-        self.sp += 1
-        low = self.read_ram(self.sp)
-        self.sp += 1
-        high = self.read_ram(self.sp)
-        ret = (high << 8) | low
+        ret = self._pop_return()
         self.pc = ret - 1
 
     def op_reti(self):
         """Return from interrupt: pop return address and set I flag."""
-        self.sp += 1
-        low = self.read_ram(self.sp)
-        self.sp += 1
-        high = self.read_ram(self.sp)
-        ret = (high << 8) | low
+        ret = self._pop_return()
         self.set_flag(SREG_I, True)
         self.pc = ret - 1
 
@@ -1242,9 +1835,5 @@ class CPU:
         """
         if not self.interrupts.get(vector_addr, False):
             return
-        ret = self.pc + 1
-        self.write_ram(self.sp, (ret >> 8) & 0xFF)
-        self.sp -= 1
-        self.write_ram(self.sp, ret & 0xFF)
-        self.sp -= 1
+        self._push_return(self.pc + 1)
         self.pc = vector_addr - 1
@@ -13,8 +13,8 @@ class Memory:
         rom_size: Number of bytes in ROM (default 2048).
 
     Attributes:
-        ram: Mutable list representing RAM contents (each element 0-255).
-        rom: Mutable list representing ROM contents (each element 0-255).
+        ram: Flat ``bytearray`` holding RAM contents (each element 0-255).
+        rom: Flat ``bytearray`` holding ROM contents (each element 0-255).
         ram_changes: Change log for RAM writes. Each entry is a tuple
             (addr, old_value, new_value, step) appended only when a write
             changes the stored byte.
@@ -35,8 +35,8 @@ class Memory:
     def __init__(self, ram_size: int = 2048, rom_size: int = 2048):
         self.ram_size = ram_size
         self.rom_size = rom_size
-        self.ram = [0] * ram_size
-        self.rom = [0] * rom_size
+        self.ram = bytearray(ram_size)
+        self.rom = bytearray(rom_size)
         self.ram_changes: list[tuple[int, int, int, int]] = []
         self.rom_changes: list[tuple[int, int, int, int]] = []
 
@@ -0,0 +1,215 @@
+"""Compact per-step execution trace for tiny8.
+
+The CPU records one trace entry per executed instruction. Instead of storing
+a dictionary snapshot of RAM for every step, :class:`StepTrace` keeps the
+scalar fields in flat per-step lists, the register snapshots in one flat
+byte buffer, and remembers where each step sits in
+the memory's write log (:attr:`tiny8.memory.Memory.ram_changes`). Memory
+snapshots are rebuilt on demand from periodic RAM checkpoints plus the
+recorded writes, so entries still look like the historical dictionaries.
+"""
+
+from collections.abc import Sequence
+
+from .memory import Memory
+
+# Registers recorded per entry.
+_NUM_REGS = 32
+
+
+class StepTrace(Sequence):
+    """Sequence of per-step trace entries backed by a memory delta log.
+
+    Indexing or iterating yields dictionaries with the keys ``step``, ``pc``,
+    ``instr``, ``regs``, ``mem``, ``sreg``, ``sp`` and ``source_line``, where
+    ``regs`` and ``mem`` describe the state before the instruction executed,
+    ``regs`` holds the register values as ``bytes`` and ``mem`` maps every
+    non-zero RAM address to its value.
+
+    Args:
+        memory: Memory whose ``ram`` and ``ram_changes`` log are traced.
+
+    Note:
+        Entries are built on access, so mutating a returned dictionary does
+        not change the trace. RAM writes must go through
+        :meth:`Memory.write_ram` to be visible in later snapshots.
+    """
+
+    #: Number of steps between full RAM checkpoints.
+    CHECKPOINT_INTERVAL = 256
+
+    def __init__(self, memory: Memory):
+        self.memory = memory
+        self._steps: list[int] = []
+        self._pcs: list[int] = []
+        self._instrs: list[str] = []
+        # Register snapshots, _NUM_REGS bytes per entry.
+        self._regs = bytearray()
+        self._sregs: list[int] = []
+        self._sps: list[int] = []
+        self._source_lines: list[int] = []
+        self._mem_pos: list[int] = []
+        # (ram_changes position, RAM bytes) taken before every
+        # CHECKPOINT_INTERVAL-th step.
+        self._checkpoints: list[tuple[int, bytes]] = []
+        self._pending_pos = 0
+        # (index, ram_changes position, non-zero RAM) of the last rebuilt
+        # snapshot, so sequential access only replays the new writes.
+        self._cursor: tuple[int, int, dict[int, int]] | None = None
+
+    def begin(self, regs: bytes | bytearray) -> None:
+        """Capture the pre-execution register and memory state for the next entry.
+
+        Must be called before the instruction executes; :meth:`append` then
+        completes the entry with the post-execution fields. Calling it again
+        without :meth:`append` (the instruction raised) discards the
+        previous capture.
+
+        Args:
+            regs: The register file, copied before the instruction executes.
+        """
+        n = len(self._pcs)
+        reg_buf = self._regs
+        if len(reg_buf) != n * _NUM_REGS:
+            del reg_buf[n * _NUM_REGS :]
+        reg_buf += regs
+        pos = len(self.memory.ram_changes)
+        if n % self.CHECKPOINT_INTERVAL == 0:
+            checkpoint = (pos, bytes(self.memory.ram))
+            slot = n // self.CHECKPOINT_INTERVAL
+            if slot < len(self._checkpoints):
+                self._checkpoints[slot] = checkpoint
+            else:
+                self._checkpoints.append(checkpoint)
+        self._pending_pos = pos
+
+    def append(
+        self,
+        step: int,
+        pc: int,
+        instr: str,
+        sreg: int,
+        sp: int,
+        source_line: int,
+    ) -> None:
+        """Record the entry for the step started by :meth:`begin`.
+
+        Args:
+            step: Step counter after the instruction executed.
+            pc: Program counter of the executed instruction.
+            instr: Display text of the instruction.
+            sreg: Status register after execution.
+            sp: Stack pointer after execution.
+            source_line: Source line of the instruction, or -1.
+        """
+        self._steps.append(step)
+        self._pcs.append(pc)
+        self._instrs.append(instr)
+        self._sregs.append(sreg)
+        self._sps.append(sp)
+        self._source_lines.append(source_line)
+        self._mem_pos.append(self._pending_pos)
+
+    def __len__(self) -> int:
+        return len(self._pcs)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        n = len(self._pcs)
+        if idx < 0:
+            idx += n
+        if not 0 <= idx < n:
+            raise IndexError("trace index out of range")
+        return {
+            "step": self._steps[idx],
+            "pc": self._pcs[idx],
+            "instr": self._instrs[idx],
+            "regs": bytes(self._regs[idx * _NUM_REGS : (idx + 1) * _NUM_REGS]),
+            "mem": self._memory_at(idx),
+            "sreg": self._sregs[idx],
+            "sp": self._sps[idx],
+            "source_line": self._source_lines[idx],
+        }
+
+    def column(self, key: str) -> list:
+        """Return one field of every entry without rebuilding memory.
+
+        Args:
+            key: Entry key other than ``"mem"``.
+
+        Returns:
+            The field's per-step values, in step order.
+
+        Raises:
+            KeyError: If ``key`` is ``"mem"`` or not an entry key.
+        """
+        if key == "regs":
+            regs = self.register_bytes()
+            return [regs[i : i + _NUM_REGS] for i in range(0, len(regs), _NUM_REGS)]
+        columns = {
+            "step": self._steps,
+            "pc": self._pcs,
+            "instr": self._instrs,
+            "sreg": self._sregs,
+            "sp": self._sps,
+            "source_line": self._source_lines,
+        }
+        return list(columns[key])
+
+    def register_bytes(self) -> bytes:
+        """Return the register snapshots of every entry as one buffer.
+
+        Returns:
+            32 bytes per entry in step order, i.e. the row-major contents of
+            an ``(entries, 32)`` register matrix.
+        """
+        return bytes(self._regs[: len(self._pcs) * _NUM_REGS])
+
+    def memory_writes(self) -> list[tuple[int, int, int]]:
+        """Return the RAM changes seen between consecutive entries.
+
+        Replays the write log once instead of rebuilding a snapshot for
+        every entry.
+
+        Returns:
+            ``(idx, addr, value)`` tuples in ascending ``idx`` order, where
+            ``idx`` is the first entry whose snapshot holds ``value`` at
+            ``addr``. Non-zero bytes of the first snapshot have ``idx`` 0;
+            several writes to one address before the same entry are all
+            listed, in write order.
+        """
+        if not self._pcs:
+            return []
+        writes = [(0, addr, val) for addr, val in self._memory_at(0).items()]
+        changes = self.memory.ram_changes
+        mem_pos = self._mem_pos
+        for idx in range(1, len(mem_pos)):
+            for addr, _, new, _ in changes[mem_pos[idx - 1] : mem_pos[idx]]:
+                writes.append((idx, addr, new))
+        return writes
+
+    def _memory_at(self, idx: int) -> dict[int, int]:
+        """Rebuild the non-zero RAM snapshot taken before step ``idx``.
+
+        Args:
+            idx: Entry index (0-based, non-negative).
+
+        Returns:
+            Mapping of address to value for every non-zero byte, in
+            ascending address order.
+        """
+        target = self._mem_pos[idx]
+        cursor = self._cursor
+        if cursor is not None and 0 <= idx - cursor[0] < self.CHECKPOINT_INTERVAL:
+            _, pos, nz = cursor
+        else:
+            pos, ram = self._checkpoints[idx // self.CHECKPOINT_INTERVAL]
+            nz = {a: v for a, v in enumerate(ram) if v}
+        for addr, _, new, _ in self.memory.ram_changes[pos:target]:
+            if new:
+                nz[addr] = new
+            else:
+                nz.pop(addr, None)
+        self._cursor = (idx, target, nz)
+        return dict(sorted(nz.items()))
@@ -3,9 +3,11 @@
 Tests for assembler parsing, number formats, and edge cases.
 """
 
+import os
+
 import pytest
 
-from tiny8 import assemble, assemble_file
+from tiny8 import CPU, assemble, assemble_file
 
 
 class TestAssemblerBasics:
@@ -91,3 +93,74 @@ class TestAssemblerWithFiles:
 
         result = assemble_file(str(asm_file))
         assert len(result.program) == 2
+
+    def test_assemble_file_matches_assemble(self, tmp_path):
+        """Test that streaming a file gives the same result as assembling text."""
+        src = "start: ldi r16, 1\n; comment\n\njmp start"
+        asm_file = tmp_path / "loop.asm"
+        asm_file.write_text(src)
+
+        assert assemble_file(str(asm_file)) == assemble(src)
+        assert assemble_file(str(asm_file), keep_source=True) == assemble(
+            src, keep_source=True
+        )
+
+    def test_assemble_file_cache(self, tmp_path):
+        """Test that unchanged files are served from the cache."""
+        asm_file = tmp_path / "cached.asm"
+        asm_file.write_text("nop")
+        first = assemble_file(str(asm_file))
+        assert assemble_file(str(asm_file)) == first
+        assert assemble_file(str(asm_file)).program is first.program
+        assert assemble_file(str(asm_file), keep_source=True) != first
+
+        first.labels["start"] = 5
+        assert assemble_file(str(asm_file)).labels == {}
+
+        asm_file.write_text("nop\nnop")
+        st = asm_file.stat()
+        os.utime(asm_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        assert len(assemble_file(str(asm_file)).program) == 2
+
+    def test_source_lines_opt_in(self):
+        """Test that source lines are only kept when requested."""
+        src = "ldi r16, 1 ; load\nnop"
+        assert assemble(src).source_lines == []
+        assert assemble(src, keep_source=True).source_lines == [
+            "ldi r16, 1 ; load",
+            "nop",
+        ]
+
+    def test_pc_to_line_opt_in(self):
+        """Test that the PC to line mapping is only built when requested."""
+        src = "; header\nldi r16, 1\n\nnop"
+        assert assemble(src).pc_to_line == {}
+        assert assemble(src, keep_source=True).pc_to_line == {0: 1, 1: 3}
+
+
+class TestOperandParsing:
+    """Test operand classification in the assembler."""
+
+    def test_register_operands_case_insensitive(self):
+        """Test that R and r register prefixes both parse as registers."""
+        result = assemble("add R16, r17")
+        assert result.program == (("ADD", (("reg", 16), ("reg", 17))),)
+
+    def test_program_is_immutable_and_copied_on_load(self):
+        """Test that loading a result gives the CPU its own program list."""
+        result = assemble("nop")
+        assert isinstance(result.program, tuple)
+        cpu = CPU()
+        cpu.load_program(result)
+        cpu.program.append(("NOP", ()))
+        assert len(result.program) == 1
+
+    def test_register_like_label_is_symbol(self):
+        """Test that labels starting with r are not parsed as registers."""
+        result = assemble("r16loop: rjmp r16loop")
+        assert result.program == (("RJMP", ("r16loop",)),)
+
+    def test_undefined_label_raises(self):
+        """Test that referencing an undefined label fails at assembly time."""
+        with pytest.raises(ValueError, match="Undefined label 'nowhere' at line 2"):
+            assemble("nop\njmp nowhere")
@@ -4,10 +4,29 @@ Tests command parsing, state management, and utility functions
 without requiring actual terminal/curses interaction.
 """
 
+import curses
 import time
 
+import pytest
+
 from tiny8 import CPU, assemble
-from tiny8.cli import KeyContext, ViewState, format_byte, run_command
+from tiny8.cli import (
+    KeyContext,
+    ViewState,
+    _build_parser,
+    _compute_diff,
+    _FrameBuffer,
+    _handle_key,
+    _input_timeout,
+    _memory_window,
+    _sorted_mem_keys,
+    _source_window,
+    _step_diff,
+    _trace_entry,
+    format_byte,
+    run_cli,
+    run_command,
+)
 
 
 class TestFormatByte:
@@ -354,6 +373,22 @@ class TestRunCommandRegister:
 
         assert "not found" in result
 
+    def test_register_track_skips_entries_without_registers(self):
+        """Test that entries lacking the register never count as a change."""
+        state = ViewState(step_idx=0)
+        traces = [
+            {"step": 0, "regs": [7] * 32},
+            {"step": 1},
+            {"step": 2, "regs": [7] * 16},
+            {"step": 3, "regs": [7] * 16 + [8] * 16},
+        ]
+        state.command_buffer = "r20"
+
+        result = run_command(state, traces)
+
+        assert "R20 changed at step 3: 0x08" in result
+        assert state.step_idx == 3
+
     def test_register_invalid_number(self):
         """Test invalid register number."""
         state = ViewState()
@@ -448,6 +483,31 @@ class TestRunCommandMemory:
 
         assert "not found" in result
 
+    def test_memory_search_in_step_trace(self):
+        """Test memory searches over a real trace's write log."""
+        cpu = CPU()
+        cpu.load_program(
+            assemble("""
+            ldi r16, 5
+            ldi r17, 0x60
+            st r17, r16
+            clr r16
+            st r17, r16
+            st r17, r17
+            nop
+        """)
+        )
+        cpu.run()
+        state = ViewState(step_idx=0)
+
+        state.command_buffer = "m0x60"
+        assert "changed at step 3: 0x05" in run_command(state, cpu.step_trace)
+        state.command_buffer = "m0x60"
+        assert "changed at step 5: 0x00" in run_command(state, cpu.step_trace)
+        state.command_buffer = "m0x60=0x60"
+        assert "at step 6" in run_command(state, cpu.step_trace)
+        assert state.step_idx == 6
+
     def test_memory_invalid_format(self):
         """Test invalid memory command format."""
         state = ViewState()
@@ -696,9 +756,9 @@ class TestKeyContext:
             n=0,
         )
 
-        before_time = time.time()
+        before_time = time.monotonic()
         ctx.set_status("Test message")
-        after_time = time.time()
+        after_time = time.monotonic()
 
         assert state.status_msg == "Test message"
         assert state.status_time >= before_time
@@ -729,6 +789,94 @@ class TestKeyContext:
         assert state.status_msg == "Second message"
         assert second_time > first_time
 
+    def test_deferred_keys_draw_nothing(self):
+        """Test that keys applied while deferred only mark a frame as due."""
+        state = ViewState()
+        ctx = KeyContext(
+            state=state,
+            scr=None,
+            traces=[{"step": i} for i in range(10)],
+            cpu=None,
+            mem_addr_start=0,
+            mem_addr_end=31,
+            source_lines=None,
+            n=10,
+            deferred=True,
+            height=7,
+        )
+
+        for key in (ord("l"), ord("l"), ord("w"), ord("h")):
+            assert _handle_key(ctx, key) is False
+
+        assert state.step_idx == 8
+        assert ctx.pending
+        assert ctx.redraw() == 7
+        assert _handle_key(ctx, ord("q")) is True
+
+    def test_command_typing_only_redraws_status(self):
+        """Test that command-line edits request a status-line redraw only."""
+        state = ViewState()
+        ctx = KeyContext(
+            state=state,
+            scr=None,
+            traces=[{"step": i} for i in range(10)],
+            cpu=None,
+            mem_addr_start=0,
+            mem_addr_end=31,
+            source_lines=None,
+            n=10,
+            deferred=True,
+        )
+
+        for key in (ord(":"), ord("5"), ord("0"), 127):
+            assert _handle_key(ctx, key) is False
+
+        assert state.command_buffer == "5"
+        assert ctx.pending_status
+        assert not ctx.pending
+
+    def test_marks_dispatch_through_key_table(self):
+        """Test that m and ' read the mark name and set or jump to it."""
+
+        class Scr:
+            def __init__(self, keys):
+                self.keys = list(keys)
+
+            def timeout(self, delay):
+                pass
+
+            def getch(self):
+                return self.keys.pop(0)
+
+        state = ViewState(step_idx=4)
+        ctx = KeyContext(
+            state=state,
+            scr=Scr([ord("a"), ord("a"), ord("b"), -1]),
+            traces=[{"step": i} for i in range(10)],
+            cpu=None,
+            mem_addr_start=0,
+            mem_addr_end=31,
+            source_lines=None,
+            n=10,
+            deferred=True,
+        )
+
+        _handle_key(ctx, ord("m"))
+        assert state.marks == {"a": 4}
+        assert ctx.pending_status and not ctx.pending
+
+        state.step_idx = 9
+        _handle_key(ctx, ord("'"))
+        assert state.step_idx == 4
+        assert ctx.pending
+
+        _handle_key(ctx, ord("'"))
+        assert state.status_msg == "Mark 'b' not set"
+
+        _handle_key(ctx, ord("m"))
+        assert state.status_msg == "Mark input timed out"
+        assert state.marks == {"a": 4}
+
 
 class TestKeyHandlerDecorator:
     """Test the key_handler decorator."""
@@ -792,3 +940,242 @@ class TestViewStateDefaults:
         assert state.command_buffer == "test"
         assert state.marks == marks
         assert state.status_msg == "Status"
+
+
+class _RecordingScreen:
+    """Minimal curses screen stand-in that logs the calls it receives."""
+
+    def __init__(self, h=4, w=20):
+        self.h, self.w = h, w
+        self.calls = []
+
+    def getmaxyx(self):
+        return (self.h, self.w)
+
+    def erase(self):
+        self.calls.append(("erase",))
+
+    def move(self, y, x):
+        self.calls.append(("move", y))
+
+    def clrtoeol(self):
+        pass
+
+    def addstr(self, y, x, text, attr=0):
+        self.calls.append(("addstr", y, text))
+
+    def noutrefresh(self):
+        self.calls.append(("noutrefresh",))
+
+
+class TestFrameBuffer:
+    """Test row-level damage tracking of drawn frames."""
+
+    @pytest.fixture(autouse=True)
+    def _no_doupdate(self, monkeypatch):
+        monkeypatch.setattr(curses, "doupdate", lambda: None)
+
+    def _present(self, scr, state, rows):
+        frame = _FrameBuffer(scr)
+        for y, text in rows.items():
+            frame.addstr(y, 0, text)
+        frame.present(state)
+
+    def test_first_frame_erases_and_draws_everything(self):
+        """Test that the first frame repaints the whole screen."""
+        scr, state = _RecordingScreen(), ViewState()
+        self._present(scr, state, {0: "a", 2: "b"})
+        assert scr.calls == [
+            ("erase",),
+            ("addstr", 0, "a"),
+            ("addstr", 2, "b"),
+            ("noutrefresh",),
+        ]
+
+    def test_only_changed_rows_are_rewritten(self):
+        """Test that unchanged rows are skipped and cleared rows are erased."""
+        scr, state = _RecordingScreen(), ViewState()
+        self._present(scr, state, {0: "a", 1: "b", 2: "c"})
+        scr.calls.clear()
+        self._present(scr, state, {0: "a", 1: "x"})
+        assert scr.calls == [("addstr", 1, "x"), ("addstr", 2, " "), ("noutrefresh",)]
+
+    def test_unchanged_frame_makes_no_calls(self):
+        """Test that presenting an identical frame skips the update."""
+        scr, state = _RecordingScreen(), ViewState()
+        self._present(scr, state, {0: "a"})
+        scr.calls.clear()
+        self._present(scr, state, {0: "a"})
+        assert scr.calls == []
+
+    def test_only_changed_cells_are_rewritten(self):
+        """Test that a row update writes just the differing runs of cells."""
+        scr, state = _RecordingScreen(), ViewState()
+        self._present(scr, state, {0: "00 00 00 00"})
+        scr.calls.clear()
+        self._present(scr, state, {0: "00 2A 00 01"})
+        assert scr.calls == [("addstr", 0, "2A"), ("addstr", 0, "1"), ("noutrefresh",)]
+
+    def test_non_ascii_rows_are_rewritten_whole(self):
+        """Test that rows curses may lay out differently are replayed."""
+        scr, state = _RecordingScreen(), ViewState()
+        self._present(scr, state, {0: "R16: 00 → 01"})
+        scr.calls.clear()
+        self._present(scr, state, {0: "R16: 01 → 02"})
+        assert scr.calls == [
+            ("move", 0),
+            ("addstr", 0, "R16: 01 → 02"),
+            ("noutrefresh",),
+        ]
+
+    def test_reset_or_resize_forces_full_redraw(self):
+        """Test that clearing the frame or resizing repaints everything."""
+        scr, state = _RecordingScreen(), ViewState()
+        self._present(scr, state, {0: "a"})
+        state.frame = None
+        scr.calls.clear()
+        self._present(scr, state, {0: "a"})
+        assert scr.calls[0] == ("erase",)
+        scr.h = 5
+        scr.calls.clear()
+        self._present(scr, state, {0: "a"})
+        assert scr.calls[0] == ("erase",)
+
+
+class TestStepDiffCache:
+    """Test reuse of trace entries and per-step diffs between frames."""
+
+    def _traces(self, reads):
+        class Traces(list):
+            def __getitem__(self, i):
+                reads.append(i)
+                return super().__getitem__(i)
+
+        return Traces(
+            {"regs": [i] * 32, "mem": {0x10: i} if i else {}, "sreg": i}
+            for i in range(10)
+        )
+
+    def test_compute_diff(self):
+        """Test the changed registers, memory and SREG bits."""
+        prev = {"regs": [0, 1], "mem": {1: 5, 2: 6}, "sreg": 0b01}
+        entry = {"regs": [0, 2, 3], "mem": {2: 6, 3: 7}, "sreg": 0b10}
+        regs, mem, sreg_xor = _compute_diff(entry, prev)
+        assert regs == ((1, 1, 2), (2, 0, 3))
+        assert mem == {1, 3}
+        assert sreg_xor == 0b11
+        assert _compute_diff(entry, None) == ((), frozenset(), 0)
+
+    def test_neighbouring_steps_reuse_entries(self):
+        """Test that stepping forward reads only one new entry per step."""
+        reads = []
+        traces, state = self._traces(reads), ViewState()
+        for idx in (0, 1, 2):
+            _trace_entry(state, traces, idx)
+            _step_diff(state, traces, idx)
+        assert reads == [0, 1, 2]
+
+    def test_cached_diff_needs_no_entries(self):
+        """Test that redrawing a visited step does not re-read the trace."""
+        reads = []
+        traces, state = self._traces(reads), ViewState()
+        first = _step_diff(state, traces, 5)
+        reads.clear()
+        state.entries = None
+        assert _step_diff(state, traces, 5) is first
+        assert reads == []
+
+    def test_sorted_mem_keys_are_cached(self):
+        """Test that a step's sorted addresses are computed once."""
+        traces, state = [{"mem": {9: 1, 2: 3, 5: 4}}], ViewState()
+        keys = _sorted_mem_keys(state, traces, 0)
+        assert keys == [2, 5, 9]
+        assert _sorted_mem_keys(state, traces, 0) is keys
+
+    def test_memory_window_is_cached(self):
+        """Test that scrolling a step reuses its memory window."""
+        reads = []
+        traces, state = self._traces(reads), ViewState()
+        vals, changed = _memory_window(state, traces, 3, 0x0E, 0x11)
+        assert vals.tolist() == [0, 0, 3, 0]
+        assert changed.tolist() == [False, False, True, False]
+        reads.clear()
+        state.entries = None
+        assert _memory_window(state, traces, 3, 0x0E, 0x11)[0] is vals
+        assert reads == []
+
+
+class TestSourceWindow:
+    """Test the cached source listing around the current line."""
+
+    def test_window_is_padded_and_cached(self):
+        """Test padding near the file start and reuse of formatted rows."""
+        state, source = ViewState(), ["ldi r16, 1  ", "nop", "nop"]
+        rows = _source_window(state, source, 0)
+        assert len(rows) == 11
+        assert rows[:5] == (("", False),) * 5
+        assert rows[5] == (">>>   1: ldi r16, 1", True)
+        assert rows[6] == ("      2: nop", False)
+        assert _source_window(state, source, 0) is rows
+        assert _source_window(state, list(source), 0) is not rows
+
+
+class TestRunCliChecks:
+    """Test argument checks done before the terminal UI starts."""
+
+    def test_source_display_requires_kept_source(self):
+        """Test that source lines need a keep_source=True assembly."""
+        src = "ldi r16, 1\nnop"
+        cpu = CPU()
+        cpu.load_program(assemble(src))
+        cpu.run()
+        with pytest.raises(RuntimeError, match="keep_source=True"):
+            run_cli(cpu, source_lines=src.splitlines())
+
+
+class TestInputTimeout:
+    """Test the getch() timeout used by the main loop."""
+
+    def test_paused_blocks(self):
+        """Test that a paused view waits for a key without polling."""
+        assert _input_timeout(ViewState()) == -1
+
+    def test_paused_wakes_for_status_expiry(self):
+        """Test that a shown status message bounds the paused wait."""
+        state = ViewState(status_msg="Mark 'a' set", status_time=time.monotonic())
+        assert 400 < _input_timeout(state) <= 500
+        state.status_time -= 1.0
+        assert _input_timeout(state) == 0
+
+    def test_playing_waits_until_next_step(self):
+        """Test that playback blocks only until the next step is due."""
+        state = ViewState(playing=True, delay=0.5, last_advance_time=time.monotonic())
+        assert 400 < _input_timeout(state) <= 500
+        state.last_advance_time -= 1.0
+        assert _input_timeout(state) == 0
+
+    def test_playing_wakes_for_status_expiry(self):
+        """Test that an earlier status expiry shortens the playback wait."""
+        now = time.monotonic()
+        state = ViewState(playing=True, delay=2.0, last_advance_time=now)
+        state.status_msg, state.status_time = "Speed: 2.00s", now
+        assert 400 < _input_timeout(state) <= 500
+
+
+class TestArgumentParser:
+    """Test the cached command-line parser."""
+
+    def test_parser_is_built_once(self):
+        """Test that repeated calls reuse the same parser."""
+        assert _build_parser() is _build_parser()
+
+    def test_memory_addresses_accept_hex(self):
+        """Test that memory range arguments accept 0x notation."""
+        args = _build_parser().parse_args(["prog.asm", "-ms", "0x10", "-me", "32"])
+        assert (args.mem_start, args.mem_end) == (0x10, 32)
+
+    def test_invalid_address_is_rejected(self, capsys):
+        """Test that a malformed address exits with a readable error."""
+        with pytest.raises(SystemExit):
+            _build_parser().parse_args(["prog.asm", "--mem-start", "zz"])
+        assert "invalid int value: 'zz'" in capsys.readouterr().err
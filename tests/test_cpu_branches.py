@@ -191,6 +191,39 @@ class TestConditionalBranches:
         cpu.pc = len(cpu.program) - 1
         cpu.step()
 
+    def test_overridden_branch_handlers_are_called(self):
+        """Test that subclass overrides of branch and jump handlers run."""
+
+        class CountingCPU(CPU):
+            def __init__(self):
+                super().__init__()
+                self.calls = []
+
+            def op_brne(self, label):
+                self.calls.append("brne")
+                super().op_brne(label)
+
+            def op_jmp(self, label):
+                self.calls.append("jmp")
+                super().op_jmp(label)
+
+        cpu = CountingCPU()
+        asm = assemble("""
+            ldi r16, 3
+        loop:
+            dec r16
+            brne loop
+            jmp done
+            ldi r17, 1
+        done:
+            nop
+        """)
+        cpu.load_program(asm)
+        cpu.run(show_progress=False)
+        assert cpu.read_reg(16) == 0
+        assert cpu.read_reg(17) == 0
+        assert cpu.calls == ["brne", "jmp", "brne", "jmp", "brne", "jmp"]
+
 
 class TestStackAndCall:
     """Test stack operations, calls, and returns."""
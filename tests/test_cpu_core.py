@@ -4,7 +4,10 @@ Tests for CPU instructions including shifts, rotates, logical operations,
 bit manipulation, and word operations.
 """
 
+import pytest
+
 from tiny8 import CPU, assemble
+from tiny8.memory import Memory
 
 
 class TestShiftRotateInstructions:
@@ -322,6 +325,25 @@ class TestRelativeJumpCall:
         assert cpu.read_reg(16) == 0
         assert cpu.read_reg(17) == 1
 
+    def test_traced_instruction_text(self):
+        """Test that traced text keeps register and label operand names."""
+        cpu = CPU()
+        asm = assemble("""
+            ldi r16, 42
+            rjmp skip
+            nop
+        skip:
+            add r16, r16
+        """)
+        cpu.load_program(asm)
+        cpu.run(show_progress=False)
+        assert cpu.step_trace.column("instr") == [
+            "LDI R16, 42",
+            "RJMP skip",
+            "ADD R16, R16",
+        ]
+        assert cpu.read_reg(16) == 84
+
     def test_rcall_instruction(self):
         """Test relative call."""
         cpu = CPU()
@@ -398,3 +420,88 @@ class TestArithmeticEdgeCases:
         cpu.load_program(asm)
         cpu.run()
         # Result is 16-bit in r0:r1
+
+
+class TestUntracedRun:
+    """Test running without step tracing."""
+
+    def test_untraced_run_matches_traced_state(self):
+        """Test that run(trace=False) reaches the same state without a trace."""
+        src = """
+            ldi r16, 5
+            ldi r17, 0x60
+        loop:
+            st r17, r16
+            inc r17
+            dec r16
+            brne loop
+            push r17
+        """
+        traced = CPU()
+        traced.load_program(assemble(src))
+        traced.run(show_progress=False)
+        fast = CPU()
+        fast.load_program(assemble(src))
+        fast.run(show_progress=False, trace=False)
+        assert len(fast.step_trace) == 0
+        assert fast.regs == traced.regs
+        assert (fast.pc, fast.sp, fast.sreg) == (traced.pc, traced.sp, traced.sreg)
+        assert fast.step_count == traced.step_count
+        assert fast.mem_trace == traced.mem_trace
+        assert not fast.running
+
+    def test_compiled_run_matches_interpreter(self):
+        """Test that compiled blocks reproduce interpreted execution exactly."""
+        src = """
+            ldi r16, 20
+            ldi r17, 0x60
+        loop:
+            st r17, r16
+            mov r19, r16
+            eor r19, r17
+            and r20, r19
+            or r21, r16
+            inc r17
+            dec r16
+            brne loop
+            rcall sub
+        done:
+            jmp done
+        sub:
+            push r16
+            pop r18
+            ret
+        """
+        for max_steps in (3, 50, 1000):
+            cpus = []
+            for compiled in (False, True):
+                cpu = CPU()
+                cpu.load_program(assemble(src))
+                if compiled:
+                    cpu.compile()
+                cpu.run(max_steps=max_steps, show_progress=False, trace=False)
+                cpus.append(cpu)
+            interp, fast = cpus
+            assert fast.regs == interp.regs
+            assert (fast.pc, fast.sp, fast.sreg) == (interp.pc, interp.sp, interp.sreg)
+            assert fast.step_count == interp.step_count == max_steps
+            assert fast.reg_trace == interp.reg_trace
+            assert fast.mem_trace == interp.mem_trace
+
+    def test_compiled_run_stops_on_faulting_instruction(self):
+        """Test that an error inside a compiled block leaves PC on its source."""
+        cpu = CPU(Memory(ram_size=64))
+        cpu.load_program(
+            assemble("""
+            loop:
+                inc r16
+                ld r17, r16
+                jmp loop
+            """)
+        )
+        cpu.compile()
+        with pytest.raises(IndexError):
+            cpu.run(show_progress=False, trace=False)
+        assert cpu.pc == 1
+        assert cpu.step_count == 3 * 63 + 1
+        assert cpu.read_reg(16) == 64
@@ -206,3 +206,77 @@ class TestCPUFlagOperations:
         # 17 / 5 = 3 remainder 2
         assert cpu.read_reg(16) == 3  # quotient
         assert cpu.read_reg(17) == 2  # remainder
+
+
+class TestCPUHandlerLinking:
+    """Test per-program handler resolution."""
+
+    def test_relinks_when_program_replaced(self):
+        """Test that assigning a new program resolves its handlers."""
+        cpu = CPU()
+        cpu.load_program([("LDI", (("reg", 16), 1))])
+        cpu.step()
+        cpu.program = [("INC", (("reg", 16),))]
+        cpu.pc = 0
+        cpu.step()
+        assert cpu.read_reg(16) == 2
+
+    def test_relinks_when_program_patched_in_place(self):
+        """Test that replacing a program entry in place takes effect."""
+        cpu = CPU()
+        cpu.load_program([("LDI", (("reg", 17), 1)), ("LDI", (("reg", 17), 2))])
+        cpu.step()
+        cpu.program[1] = ("LDI", (("reg", 17), 99))
+        cpu.step()
+        assert cpu.read_reg(17) == 99
+
+    def test_compiled_program_patched_in_place(self):
+        """Test that untraced runs of a compiled program see patches."""
+        cpu = CPU()
+        cpu.load_program(
+            assemble("""
+                ldi r16, 10
+            loop:
+                inc r17
+                dec r16
+                brne loop
+            """)
+        )
+        cpu.compile()
+        cpu.run(show_progress=False, trace=False)
+        assert cpu.read_reg(17) == 10
+        cpu.program[1] = ("SUBI", (("reg", 17), 1))
+        cpu.pc = 0
+        cpu.run(show_progress=False, trace=False)
+        assert cpu.read_reg(17) == 0
+
+    def test_unknown_instruction_only_fails_when_executed(self):
+        """Test that unimplemented mnemonics do not fail at load time."""
+        cpu = CPU()
+        cpu.load_program([("LDI", (("reg", 16), 1)), ("BOGUS", ())])
+        assert cpu.step() is True
+        with pytest.raises(NotImplementedError):
+            cpu.step()
+
+
+class TestCPURamAccess:
+    """Test the CPU's direct RAM accessors."""
+
+    def test_write_ram_logs_changes_in_memory(self):
+        """Test that CPU writes land in Memory and its change log."""
+        cpu = CPU()
+        cpu.step_count = 3
+        cpu.write_ram(0x60, 0x1FF)
+        cpu.write_ram(0x60, 0xFF)
+        assert cpu.mem.read_ram(0x60) == 0xFF
+        assert cpu.mem.ram_changes == [(0x60, 0, 0xFF, 3)]
+        assert cpu.mem_trace == [(3, 0x60, 0xFF), (3, 0x60, 0xFF)]
+
+    @pytest.mark.parametrize("addr", [-1, 2048])
+    def test_out_of_range_access_raises(self, addr):
+        """Test that addresses outside RAM raise IndexError."""
+        cpu = CPU()
+        with pytest.raises(IndexError, match="RAM address out of range"):
+            cpu.read_ram(addr)
+        with pytest.raises(IndexError, match="RAM address out of range"):
+            cpu.write_ram(addr, 1)
@@ -0,0 +1,150 @@
+"""Step trace tests.
+
+Tests for on-demand memory snapshots rebuilt from the RAM write log.
+"""
+
+import pytest
+
+from tiny8 import CPU, assemble
+from tiny8.trace import StepTrace
+
+
+def _run(src: str, max_steps: int = 1000) -> CPU:
+    cpu = CPU()
+    cpu.load_program(assemble(src))
+    cpu.run(max_steps=max_steps, show_progress=False)
+    return cpu
+
+
+class TestStepTraceSnapshots:
+    """Test memory snapshots exposed by trace entries."""
+
+    def test_snapshot_is_pre_execution_state(self):
+        """Test that an entry shows memory before its instruction ran."""
+        cpu = _run("""
+            ldi r16, 7
+            ldi r17, 0x60
+            st r17, r16
+            nop
+        """)
+        assert cpu.step_trace[2]["mem"] == {}
+        assert cpu.step_trace[3]["mem"] == {0x60: 7}
+
+    def test_writes_before_run_are_included(self):
+        """Test that RAM written before stepping appears in the first entry."""
+        cpu = CPU()
+        cpu.write_ram(0x10, 1)
+        cpu.load_program(assemble("nop"))
+        cpu.run(show_progress=False)
+        assert cpu.step_trace[0]["mem"] == {0x10: 1}
+
+    def test_cleared_bytes_are_dropped(self):
+        """Test that bytes written back to zero leave the snapshot."""
+        cpu = _run("""
+            ldi r16, 5
+            ldi r17, 0x20
+            st r17, r16
+            clr r16
+            st r17, r16
+            nop
+        """)
+        assert cpu.step_trace[4]["mem"] == {0x20: 5}
+        assert cpu.step_trace[5]["mem"] == {}
+
+    def test_random_access_matches_sequential(self):
+        """Test that out-of-order access rebuilds the same snapshots."""
+        cpu = _run(
+            """
+            ldi r17, 0
+        loop:
+            st r17, r17
+            inc r17
+            jmp loop
+            """,
+            max_steps=2000,
+        )
+        trace = cpu.step_trace
+        sequential = [entry["mem"] for entry in trace]
+        for idx in (1999, 3, 700, 256, 255, 1024, 0, 1500):
+            assert trace[idx]["mem"] == sequential[idx]
+        assert trace[-1]["mem"] == sequential[-1]
+
+
+class TestStepTraceSequence:
+    """Test list-like behaviour of StepTrace."""
+
+    def test_len_and_slicing(self):
+        """Test length, slicing and out-of-range indexing."""
+        cpu = _run("ldi r16, 1\nldi r17, 2\nnop")
+        trace = cpu.step_trace
+        assert isinstance(trace, StepTrace)
+        assert len(trace) == 3
+        assert [e["pc"] for e in trace[1:]] == [1, 2]
+        with pytest.raises(IndexError):
+            trace[3]
+
+    def test_entry_fields(self):
+        """Test that entries expose the historical keys."""
+        entry = _run("ldi r16, 1").step_trace[0]
+        assert set(entry) == {
+            "step",
+            "pc",
+            "instr",
+            "regs",
+            "mem",
+            "sreg",
+            "sp",
+            "source_line",
+        }
+        assert entry["instr"] == "LDI R16, 1"
+
+    def test_column(self):
+        """Test that columns match the per-entry fields."""
+        trace = _run("ldi r16, 1\nldi r17, 2\nnop").step_trace
+        assert trace.column("pc") == [e["pc"] for e in trace]
+        assert trace.column("regs") == [e["regs"] for e in trace]
+        with pytest.raises(KeyError):
+            trace.column("mem")
+
+    def test_register_bytes(self):
+        """Test that the register buffer holds each entry's snapshot in order."""
+        trace = _run("ldi r16, 1\nldi r17, 2\nnop").step_trace
+        regs = trace.register_bytes()
+        assert len(regs) == 3 * 32
+        assert [regs[i : i + 32] for i in range(0, 96, 32)] == trace.column("regs")
+        assert trace[2]["regs"][16:18] == b"\x01\x02"
+
+    def test_failed_step_leaves_no_registers(self):
+        """Test that a step that raised does not shift later register rows."""
+        cpu = CPU()
+        cpu.load_program(assemble("ldi r16, 3\npop r17\nldi r18, 4"))
+        cpu.step()
+        with pytest.raises(IndexError):
+            cpu.step()
+        cpu.pc = 2
+        cpu.step()
+        trace = cpu.step_trace
+        assert len(trace.register_bytes()) == 2 * 32
+        assert trace[1]["regs"][16] == 3
+        assert trace[1]["pc"] == 2
+
+    def test_memory_writes(self):
+        """Test that replayed writes reproduce every snapshot."""
+        cpu = _run(
+            """
+            ldi r17, 0
+        loop:
+            st r17, r17
+            inc r17
+            jmp loop
+            """,
+            max_steps=600,
+        )
+        trace = cpu.step_trace
+        writes = trace.memory_writes()
+        mem: dict[int, int] = {}
+        for idx, entry in enumerate(trace):
+            while writes and writes[0][0] == idx:
+                _, addr, val = writes.pop(0)
+                mem[addr] = val
+            assert {a: v for a, v in mem.items() if v} == entry["mem"]
@@ -8,6 +8,8 @@ Following best practices for testing UI code:
 """
 
 import io
+import subprocess
+import sys
 from unittest.mock import Mock, patch
 
 import pytest
@@ -99,9 +101,10 @@ class TestCLILogic:
 
     def test_key_handler_decorator(self):
         """Test key handler registration decorator."""
-        from tiny8.cli import _key_handlers, key_handler
+        from tiny8.cli import _key_handlers, _key_table, key_handler
 
         original_handlers = _key_handlers.copy()
+        original_table = _key_table.copy()
         _key_handlers.clear()
 
         @key_handler(ord("t"), ord("T"))
@@ -111,9 +114,11 @@ class TestCLILogic:
         assert ord("t") in _key_handlers
         assert ord("T") in _key_handlers
         assert _key_handlers[ord("t")] == test_handler
+        assert _key_table[ord("t")] == test_handler
 
         _key_handlers.clear()
         _key_handlers.update(original_handlers)
+        _key_table[:] = original_table
 
 
 class TestCLIFunctionsMocked:
@@ -390,7 +395,7 @@ class TestVisualizerDataExtraction:
         assert len(cpu.step_trace) > 0
         for entry in cpu.step_trace:
             regs = entry.get("regs", [])
-            assert isinstance(regs, list)
+            assert isinstance(regs, bytes)
             if regs:
                 assert len(regs) == 32
 
@@ -544,6 +549,19 @@ class TestIntegrationMinimal:
         assert hasattr(viz.cpu, "step_trace")
         assert viz.cpu == cpu
 
+    def test_ui_modules_load_lazily(self):
+        """Test that importing tiny8 defers the visualizer and CLI modules."""
+        code = (
+            "import sys, tiny8; "
+            "assert 'tiny8.visualizer' not in sys.modules; "
+            "assert 'tiny8.cli' not in sys.modules; "
+            "from tiny8 import Visualizer, run_cli; "
+            "import tiny8.visualizer, tiny8.cli; "
+            "assert Visualizer is tiny8.visualizer.Visualizer; "
+            "assert run_cli is tiny8.cli.run_cli"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
     @patch("sys.stdout", new_callable=io.StringIO)
     def test_cli_help_output(self, mock_stdout):
         """Test CLI argument parsing help."""